@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UserDetailsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'User_details'
+
+    def ready(self):
+        # Register model signal handlers
+        from . import signals  # noqa: F401
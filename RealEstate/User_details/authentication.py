@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import CustomUser
+
+# Claims CustomTokenObtainPairSerializer.get_token puts in every token
+CLAIM_FIELDS = ('username', 'email')
+
+# Seconds a user's active/revocation state may be served from cache
+USER_STATE_TTL = getattr(settings, 'AUTH_USER_STATE_TTL', 60)
+
+
+def user_state_key(user_id):
+    return f'auth:user-state:{user_id}'
+
+
+def get_user_state(user_id):
+    """
+    Returns {'is_active', 'password'} for a user, or None if the user no
+    longer exists. Cached for USER_STATE_TTL seconds so authenticated
+    requests don't each pay for a user query.
+    """
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = CustomUser.objects.filter(pk=user_id).values('is_active', 'password').first()
+        state = {
+            'exists': row is not None,
+            'is_active': bool(row and row['is_active']),
+            # Only a hash of the hash is cached, as simplejwt's revoke claim does
+            'password': get_md5_hash_password(row['password']) if row else None,
+        }
+        cache.set(key, state, USER_STATE_TTL)
+    return state if state['exists'] else None
+
+
+def forget_user_state(user_id):
+    cache.delete(user_state_key(user_id))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user SELECT.
+
+    request.user is a CustomUser built from the token claims (id, username,
+    email); every other field is deferred and loaded from the database only
+    if a view or permission actually reads it. Active/revoked checks use a
+    short-lived cache instead of loading the full row.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user_id = CustomUser._meta.get_field(api_settings.USER_ID_FIELD).to_python(user_id)
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != state['password']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        loaded = {api_settings.USER_ID_FIELD: user_id, 'is_active': state['is_active']}
+        for field in CLAIM_FIELDS:
+            if field in validated_token:
+                loaded[field] = validated_token[field]
+        # from_db() expects values in model field order and marks every
+        # field we don't pass as deferred
+        names = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in loaded]
+        return CustomUser.from_db(DEFAULT_DB_ALIAS, names, [loaded[name] for name in names])
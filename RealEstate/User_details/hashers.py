@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import APIException
+
+# Set on the pool's threads, so a hasher call made from one (verify()
+# calling encode()) runs in place instead of waiting on its own pool
+_local = threading.local()
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-ins in progress, try again shortly.'
+    default_code = 'hashing_busy'
+
+
+def mark_pool_thread():
+    _local.in_pool = True
+
+
+class HashPool:
+    """
+    Runs password hashing on at most `concurrency` threads per process, so
+    a burst of logins or registrations uses that many cores and leaves the
+    rest to the API. Up to `backlog` more calls wait for a thread; beyond
+    that they fail at once with HashingBusy (503) rather than queue until
+    the worker times out. hashlib and argon2 release the GIL while hashing,
+    so the threads do run in parallel.
+    """
+
+    def __init__(self, concurrency, backlog):
+        self.executor = ThreadPoolExecutor(
+            concurrency, thread_name_prefix='password-hash', initializer=mark_pool_thread,
+        )
+        self.slots = threading.BoundedSemaphore(concurrency + backlog)
+
+    def run(self, func, *args, **kwargs):
+        if getattr(_local, 'in_pool', False):
+            return func(*args, **kwargs)
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self.executor.submit(func, *args, **kwargs).result()
+        finally:
+            self.slots.release()
+
+
+@lru_cache(maxsize=None)
+def get_pool():
+    return HashPool(
+        getattr(settings, 'PASSWORD_HASH_CONCURRENCY', 2),
+        getattr(settings, 'PASSWORD_HASH_BACKLOG', 20),
+    )
+
+
+class PooledHasherMixin:
+    """Runs a Django hasher's expensive calls on the shared HashPool."""
+
+    def encode(self, *args, **kwargs):
+        return get_pool().run(super().encode, *args, **kwargs)
+
+    def verify(self, *args, **kwargs):
+        return get_pool().run(super().verify, *args, **kwargs)
+
+    def harden_runtime(self, *args, **kwargs):
+        return get_pool().run(super().harden_runtime, *args, **kwargs)
+
+
+# Same algorithm names as Django's, so existing hashes keep verifying
+class PooledScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class PooledArgon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """Needs the argon2-cffi package."""
+
+
+class PooledPBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
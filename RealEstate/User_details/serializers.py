@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from .models import CustomUser
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
@@ -23,24 +24,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ('username', 'email', 'password', 'password2')
+        # No UniqueValidator lookups: the unique constraints reject duplicates
+        # in the INSERT itself, without racing a separate check (see create)
         extra_kwargs = {
-            'username': {'required': True}
+            'username': {'required': True, 'validators': []},
+            'email': {'validators': []},
         }
 
     def validate(self, attrs):
         if attrs['password'] != attrs['password2']:
             raise serializers.ValidationError({"password": "Passwords must match."})
-        
-        if CustomUser.objects.filter(email=attrs['email']).exists():
-             raise serializers.ValidationError({"email": "A user with this email already exists."})
-
         return attrs
 
     def create(self, validated_data):
-        user = CustomUser.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
-        )
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    password=validated_data['password']
+                )
+        except IntegrityError:
+            # Only failed sign-ups pay for finding out which field clashed
+            if CustomUser.objects.filter(email=validated_data['email']).exists():
+                raise serializers.ValidationError({"email": "A user with this email already exists."})
+            raise serializers.ValidationError({"username": "A user with that username already exists."})
         return user
 
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_state
+from .models import CustomUser
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_user_state(sender, instance, **kwargs):
+    # Deactivation, password changes and deletes apply on the next request
+    forget_user_state(instance.pk)
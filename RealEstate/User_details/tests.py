@@ -1,3 +1,145 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from backend_core.throttling import SlidingWindowThrottle
+from . import hashers
+from .models import CustomUser
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    login_url = '/api/v1/User_details/login/'
+    properties_url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.properties_url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if 'User_details_customuser' in q['sql']]
+
+    def test_user_comes_from_token_claims(self):
+        self.user_queries()  # warms the active-state cache
+        self.assertEqual(self.user_queries(), [])
+
+    def test_deactivated_user_is_rejected(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.properties_url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_deferred_fields_load_on_demand(self):
+        response = self.client.post('/api/v1/properties/', {
+            'address': '1 Main Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '1.00', 'bedrooms': 1, 'bathrooms': '1.0', 'size': 10,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['owner'], self.user.pk)
+        self.assertEqual(response.data['owner_username'], 'alice')
+
+
+class LoginQueryBudgetTests(APITestCase):
+    login_url = '/api/v1/User_details/login/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def test_login_is_one_query(self):
+        # The user lookup by email; the token is built without touching the database
+        with self.assertNumQueries(1):
+            response = self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+
+
+class AuthThrottleTests(APITestCase):
+    login_url = '/api/v1/User_details/login/'
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'auth': '3/min'}})
+    # One point in a window: crossing a boundary mid-test would let the
+    # previous window's weight decay below the limit
+    @mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6030.0)
+    def test_login_and_registration_share_a_per_ip_limit(self, timer):
+        statuses = [
+            self.client.post(self.login_url, {'email': 'nobody@example.com', 'password': 'guess'}).status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(statuses, [401, 401, 401])
+        response = self.client.post('/api/v1/User_details/register/', {})
+        self.assertEqual(response.status_code, 429)
+        # Rejected before the password is checked
+        with self.assertNumQueries(0):
+            response = self.client.post(self.login_url, {'email': 'nobody@example.com', 'password': 'guess'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+# Hashing is slow by design; keep these logins out of the slow-request log
+@override_settings(PERF_SLOW_REQUEST_MS=60_000)
+class PasswordHashingTests(APITestCase):
+    login_url = '/api/v1/User_details/login/'
+    register_url = '/api/v1/User_details/register/'
+
+    def register(self, username, email):
+        return self.client.post(self.register_url, {
+            'username': username, 'email': email, 'password': 'pw-12345', 'password2': 'pw-12345',
+        })
+
+    def test_old_hashes_are_upgraded_on_login(self):
+        user = CustomUser.objects.create(
+            username='alice', email='alice@example.com', password=make_password('pw', hasher='pbkdf2_sha256'),
+        )
+        response = self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        # Upgraded once: the next login verifies without writing
+        with self.assertNumQueries(1):
+            self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+
+    def test_registration_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.register('alice', 'alice@example.com')
+        self.assertEqual(response.status_code, 201)
+        sql = [q['sql'] for q in ctx.captured_queries if 'User_details_customuser' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertTrue(sql[0].startswith('INSERT'))
+
+    def test_duplicates_are_rejected_by_the_constraint(self):
+        self.register('alice', 'alice@example.com')
+        response = self.register('alice2', 'alice@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+        response = self.register('alice', 'other@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', response.data)
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+    def test_full_pool_turns_logins_away(self):
+        CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        pool = hashers.HashPool(concurrency=1, backlog=0)
+        with mock.patch.object(hashers, 'get_pool', return_value=pool):
+            self.assertTrue(pool.slots.acquire(blocking=False))
+            response = self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+            self.assertEqual(response.status_code, 503)
+            pool.slots.release()
+            response = self.client.post(self.login_url, {'email': 'alice@example.com', 'password': 'pw'})
+            self.assertEqual(response.status_code, 200)
@@ -4,15 +4,19 @@ from rest_framework.permissions import AllowAny
 from .serializers import UserRegistrationSerializer, CustomTokenObtainPairSerializer
 from .models import CustomUser
 from rest_framework_simplejwt.views import TokenObtainPairView
+from backend_core.throttling import AuthThrottle
 
 # Custom Email-based Login View
 class CustomTokenObtainPairView(TokenObtainPairView):
     # Tell this view to use your new custom serializer
     serializer_class = CustomTokenObtainPairSerializer
+    # Per-IP limit on password guesses
+    throttle_classes = (AuthThrottle,)
 
 # User Registration View
 class UserRegistrationView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserRegistrationSerializer
+    throttle_classes = (AuthThrottle,)
 
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve through this (gunicorn_asgi.conf.py) for /api/v1/properties/events/:
+its Server-Sent Event streams stay open, which only an async server can
+hold without tying up a worker per client.
 """
 
 import os
@@ -0,0 +1,171 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Stats of the request being handled, if it is instrumented
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        # Named sections reported with measure(), e.g. 'serialize'
+        self.sections = {}
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+
+@contextmanager
+def measure(name):
+    """Adds the time spent in the block to the current request's `name` section."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(name, time.perf_counter() - started)
+
+
+class QueryTimer:
+    """connection.execute_wrapper() that counts and times every query."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stats.queries += 1
+            self.stats.db_seconds += time.perf_counter() - started
+
+
+def save_profile(request, profile, duration_ms):
+    """Default PERF_PROFILE_HANDLER: writes a .prof file for snakeviz/pstats."""
+    directory = getattr(settings, 'PERF_PROFILE_DIR', 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    name = f"{int(time.time() * 1000)}-{request.method}-{request.path.strip('/').replace('/', '_')}.prof"
+    path = os.path.join(directory, name)
+    profile.dump_stats(path)
+    logger.warning('Saved profile of a %.0f ms request to %s', duration_ms, path)
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, query count and time, serializer time and response
+    size for every request. Reports them in a Server-Timing header (visible
+    in the browser's network panel) and as one JSON log line; requests
+    slower than PERF_SLOW_REQUEST_MS log at WARNING, the rest at INFO.
+
+    With PERF_PROFILE_SAMPLE_RATE > 0 that fraction of requests runs under
+    cProfile, and profiles of those slower than PERF_PROFILE_THRESHOLD_MS
+    go to PERF_PROFILE_HANDLER. With sampling off the only cost is the
+    query wrapper and a few timer calls.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        profile = self.start_profile()
+        try:
+            with self.timed_queries(stats):
+                response = self.get_response(request)
+        finally:
+            if profile is not None:
+                profile.disable()
+            _current.reset(token)
+        return self.finish(request, response, stats, profile)
+
+    async def __acall__(self, request):
+        # Async views query from a thread-sensitive executor thread, so the
+        # query wrapper is installed on that thread's connections.
+        # Not profiled: cProfile would only see the event loop.
+        stats = RequestStats()
+        token = _current.set(stats)
+        queries = ExitStack()
+        try:
+            await sync_to_async(queries.enter_context)(self.timed_queries(stats))
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, None)
+
+    @contextmanager
+    def timed_queries(self, stats):
+        timer = QueryTimer(stats)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            yield
+
+    def start_profile(self):
+        rate = getattr(settings, 'PERF_PROFILE_SAMPLE_RATE', 0)
+        if not rate or random.random() >= rate:
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, request, response, stats, profile):
+        duration_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_seconds * 1000
+        sections_ms = {name: seconds * 1000 for name, seconds in stats.sections.items()}
+
+        timings = [f'db;dur={db_ms:.1f};desc="{stats.queries} queries"']
+        timings += [f'{name};dur={ms:.1f}' for name, ms in sections_ms.items()]
+        timings.append(f'total;dur={duration_ms:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        slow = duration_ms >= getattr(settings, 'PERF_SLOW_REQUEST_MS', 500)
+        level = logging.WARNING if slow else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 1),
+                'db_queries': stats.queries,
+                'db_ms': round(db_ms, 1),
+                **{f'{name}_ms': round(ms, 1) for name, ms in sections_ms.items()},
+                # Unknown for streamed responses
+                'response_bytes': None if response.streaming else len(response.content),
+            }))
+
+        if profile is not None and duration_ms >= getattr(settings, 'PERF_PROFILE_THRESHOLD_MS', 500):
+            handler = import_string(getattr(
+                settings, 'PERF_PROFILE_HANDLER', 'backend_core.instrumentation.save_profile',
+            ))
+            handler(request, profile, duration_ms)
+        return response
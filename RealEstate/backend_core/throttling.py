@@ -0,0 +1,149 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# --- Counter stores ---
+class CacheCounterStore:
+    """
+    Counters kept in the THROTTLE_CACHE Django cache: local memory in
+    development and tests, Redis (django.core.cache.backends.redis.RedisCache)
+    in production so every worker shares them. add() and incr() are atomic
+    on both, so concurrent requests never lose a count.
+    """
+
+    def __init__(self):
+        self.alias = getattr(settings, 'THROTTLE_CACHE', 'default')
+
+    @property
+    def cache(self):
+        # caches[] hands out a per-thread connection
+        return caches[self.alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def incr(self, key, timeout):
+        if self.cache.add(key, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(key, 1, timeout)
+            return 1
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    return import_string(getattr(settings, 'THROTTLE_STORE', 'backend_core.throttling.CacheCounterStore'))()
+
+
+# --- Throttles ---
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window counter: one counter per fixed window, and the previous
+    window's count weighted by how much of it still overlaps the sliding
+    window. A check reads two counters and increments one, whatever the
+    rate, instead of SimpleRateThrottle's list of every request timestamp.
+
+    Subclasses set `scope` and return None from get_cache_key() for
+    requests they don't apply to. A scope without a rate in
+    DEFAULT_THROTTLE_RATES is not throttled.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Read per request, so changed settings (and tests) take effect
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        current_key, previous_key = f'{key}:{int(window)}', f'{key}:{int(window) - 1}'
+        store = get_store()
+        counts = store.get_many([current_key, previous_key])
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+        self.elapsed = elapsed
+
+        weight = 1 - elapsed / self.duration
+        if self.previous * weight + self.current >= self.num_requests:
+            return False
+        # Kept while it can still be the previous window
+        store.incr(current_key, 2 * self.duration)
+        return True
+
+    def wait(self):
+        """Seconds until the sliding estimate drops below the limit."""
+        limit, duration = self.num_requests, self.duration
+        if self.current < limit and self.previous:
+            # The previous window's share decays enough within this window
+            return max(0, duration * (1 - (limit - self.current) / self.previous) - self.elapsed)
+        # Wait for the next window, where this one's count decays
+        return duration - self.elapsed + max(0, duration * (1 - limit / self.current))
+
+    def user_key(self, request):
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+    def ip_key(self, request):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AnonReadThrottle(SlidingWindowThrottle):
+    """Anonymous reads, per client IP."""
+    scope = 'anon_read'
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated or request.method not in SAFE_METHODS:
+            return None
+        return self.ip_key(request)
+
+
+class AnonSearchThrottle(AnonReadThrottle):
+    """Anonymous full-text searches (?q=), the most expensive read, per client IP."""
+    scope = 'anon_search'
+
+    def get_cache_key(self, request, view):
+        if not request.query_params.get('q'):
+            return None
+        return super().get_cache_key(request, view)
+
+
+class UserWriteThrottle(SlidingWindowThrottle):
+    """Authenticated writes, per user."""
+    scope = 'user_write'
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated or request.method in SAFE_METHODS:
+            return None
+        return self.user_key(request)
+
+
+class AuthThrottle(SlidingWindowThrottle):
+    """Login and registration attempts, per client IP."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.ip_key(request)
+
+
+class SignatureThrottle(SlidingWindowThrottle):
+    """Cloudinary upload signatures, per user."""
+    scope = 'signature'
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return self.user_key(request)
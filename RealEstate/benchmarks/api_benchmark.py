@@ -0,0 +1,217 @@
+"""
+In-process latency and query-count benchmark for the REST API.
+
+Seed a database first (never run this against production: it logs in and
+creates, then deletes, properties):
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python manage.py migrate
+    DATABASE_URL=sqlite:///bench.sqlite3 python manage.py seed_properties --properties 100000
+
+then run
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python benchmarks/api_benchmark.py --output before.json
+    ... change code ...
+    DATABASE_URL=sqlite:///bench.sqlite3 python benchmarks/api_benchmark.py --compare before.json
+
+Each scenario goes through Django's full request cycle with the test
+client, so no server is needed and numbers exclude network time. The
+anonymous response cache is cleared before every read unless --warm-cache
+is given. Results are JSON (stable key order) so they can be diffed across
+commits; query budgets are asserted in property_details/tests.py and
+User_details/tests.py.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_core.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+# Every scenario comes from one client; measure the views, not the 429s
+os.environ.setdefault('THROTTLE_ENABLED', 'False')
+
+import django  # noqa: E402
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from property_details.management.commands.seed_properties import (  # noqa: E402
+    BENCHMARK_EMAIL, BENCHMARK_PASSWORD, CITIES, FEATURES,
+)
+from property_details.models import Property  # noqa: E402
+
+PROPERTIES_URL = '/api/v1/properties/'
+LOGIN_URL = '/api/v1/User_details/login/'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Scenarios:
+    """Each scenario method issues one request and returns the response."""
+
+    def __init__(self, rng, warm_cache):
+        self.rng = rng
+        self.warm_cache = warm_cache
+        self.anonymous = Client()
+        self.agent = Client()
+        response = self.login()
+        if response.status_code != 200:
+            raise SystemExit('Benchmark login failed; run `manage.py seed_properties` first.')
+        self.agent.defaults['HTTP_AUTHORIZATION'] = f"Bearer {response.json()['access']}"
+        self.property_ids = list(
+            Property.objects.filter(status=Property.PropertyStatus.ACTIVE)
+            .order_by('?').values_list('id', flat=True)[:1000]
+        )
+        if not self.property_ids:
+            raise SystemExit('No active properties; run `manage.py seed_properties` first.')
+        self.created_ids = []
+
+    def read(self, path, params=None):
+        if not self.warm_cache:
+            cache.clear()
+        return self.anonymous.get(path, params)
+
+    def list(self):
+        return self.read(PROPERTIES_URL, {'page_size': 20})
+
+    def filtered_list(self):
+        city, state, _, _ = self.rng.choice(CITIES)
+        return self.read(PROPERTIES_URL, {
+            'city': city, 'state': state, 'bedrooms': self.rng.randint(1, 4),
+            'min_price': 200000, 'max_price': 900000, 'page_size': 20,
+        })
+
+    def search(self):
+        return self.read(PROPERTIES_URL, {'q': self.rng.choice(FEATURES), 'page_size': 20})
+
+    def detail(self):
+        return self.read(f'{PROPERTIES_URL}{self.rng.choice(self.property_ids)}/')
+
+    def market_stats(self):
+        city, state, _, _ = self.rng.choice(CITIES)
+        return self.read(f'{PROPERTIES_URL}market-stats/', {'state': state, 'city': city})
+
+    def create_with_images(self):
+        city, state, _, _ = self.rng.choice(CITIES)
+        response = self.agent.post(PROPERTIES_URL, {
+            'address': '1 Benchmark Street', 'city': city, 'state': state, 'zip_code': '00000',
+            'price': '350000.00', 'bedrooms': 3, 'bathrooms': '2.0', 'size': 1500,
+            'image_urls': [f'https://example.com/bench/{i}.jpg' for i in range(5)],
+        }, content_type='application/json')
+        if response.status_code == 201:
+            self.created_ids.append(response.json()['id'])
+        return response
+
+    def login(self):
+        return self.anonymous.post(LOGIN_URL, {'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD})
+
+    def cleanup(self):
+        # Delete one by one so the signals keep the facet aggregate right
+        for prop in Property.objects.filter(pk__in=self.created_ids):
+            prop.delete()
+
+
+SCENARIOS = ('list', 'filtered_list', 'search', 'detail', 'market_stats', 'create_with_images', 'login')
+
+
+def run_scenario(run, requests, warmup):
+    for _ in range(warmup):
+        run()
+    latencies, queries, errors = [], [], 0
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = run()
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(ctx.captured_queries))
+        if response.status_code >= 400:
+            errors += 1
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'queries': max(queries),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    print(f"{'scenario':<20} {'p50 ms':>16} {'p95 ms':>16} {'queries':>10}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<20} (new)")
+            continue
+
+        def delta(key):
+            change = result[key] - before[key]
+            return f"{result[key]} ({change:+.4g})"
+        print(f"{name:<20} {delta('p50_ms'):>16} {delta('p95_ms'):>16} {delta('queries'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--requests', type=int, default=100, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--warm-cache', action='store_true', help='keep the anonymous response cache')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', help='print the change against an earlier --output file')
+    args = parser.parse_args()
+
+    scenarios = Scenarios(random.Random(args.seed), args.warm_cache)
+    try:
+        results = {
+            name: run_scenario(getattr(scenarios, name), args.requests, args.warmup)
+            for name in args.scenarios.split(',')
+        }
+    finally:
+        scenarios.cleanup()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'properties': Property.objects.count(),
+            'warm_cache': args.warm_cache,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    if args.compare:
+        compare(results, args.compare)
+    elif not args.output:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
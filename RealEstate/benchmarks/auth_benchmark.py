@@ -0,0 +1,175 @@
+"""
+Login and registration throughput under concurrent clients.
+
+Run it once per hasher against a migrated database, e.g.
+
+    export DATABASE_URL=sqlite:///bench.sqlite3
+    PASSWORD_HASHER=pbkdf2 python benchmarks/auth_benchmark.py --output pbkdf2.json
+    PASSWORD_HASHER=scrypt python benchmarks/auth_benchmark.py --compare pbkdf2.json
+
+`--threads` clients send requests back to back through Django's full
+request cycle in this process, so the numbers show what one worker
+process sustains with PASSWORD_HASH_CONCURRENCY hashing threads. 503s
+are requests the hash pool turned away (PASSWORD_HASH_BACKLOG). The
+benchmark's users are deleted afterwards.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_core.settings')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+# Every client comes from one IP; measure hashing, not the 429s
+os.environ.setdefault('THROTTLE_ENABLED', 'False')
+
+import django  # noqa: E402
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from User_details.models import CustomUser  # noqa: E402
+
+LOGIN_URL = '/api/v1/User_details/login/'
+REGISTER_URL = '/api/v1/User_details/register/'
+PASSWORD = 'auth-benchmark-password'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Scenarios:
+    """Each scenario method sends the i-th request with a client and returns the response."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.email = f'auth-bench-{self.run_id}@example.com'
+        CustomUser.objects.create_user(username=f'auth-bench-{self.run_id}', email=self.email, password=PASSWORD)
+
+    def login(self, client, i):
+        return client.post(LOGIN_URL, {'email': self.email, 'password': PASSWORD})
+
+    def register(self, client, i):
+        return client.post(REGISTER_URL, {
+            'username': f'auth-bench-{self.run_id}-{i}', 'email': f'auth-bench-{self.run_id}-{i}@example.com',
+            'password': PASSWORD, 'password2': PASSWORD,
+        })
+
+    def cleanup(self):
+        CustomUser.objects.filter(email__startswith=f'auth-bench-{self.run_id}').delete()
+
+
+SCENARIOS = ('login', 'register')
+
+
+def run_scenario(send, requests, threads):
+    numbers = itertools.count()
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+
+    def run_client():
+        client = Client()
+        try:
+            while (i := next(numbers)) < requests:
+                started = time.perf_counter()
+                status = send(client, i).status_code
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for future in [pool.submit(run_client) for _ in range(threads)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'per_second': round(requests / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    print(f"{'scenario':<12} {'req/s':>18} {'p50 ms':>18} {'p95 ms':>18}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<12} (new)")
+            continue
+
+        def delta(key):
+            change = result[key] - before[key]
+            return f"{result[key]} ({change:+.4g})"
+        print(f"{name:<12} {delta('per_second'):>18} {delta('p50_ms'):>18} {delta('p95_ms'):>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--requests', type=int, default=100, help='requests per scenario')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', help='print the change against an earlier --output file')
+    args = parser.parse_args()
+
+    scenarios = Scenarios()
+    try:
+        results = {
+            name: run_scenario(getattr(scenarios, name), args.requests, args.threads)
+            for name in args.scenarios.split(',')
+        }
+    finally:
+        scenarios.cleanup()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'hasher': settings.PASSWORD_HASHER,
+            'hash_concurrency': settings.PASSWORD_HASH_CONCURRENCY,
+            'threads': args.threads,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    if args.compare:
+        compare(results, args.compare)
+    elif not args.output:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Closed-loop HTTP load test for comparing the sync and async read paths.
+
+Start the two servers against the same database, with rate limiting
+off (every client comes from one IP), e.g.
+
+    export THROTTLE_ENABLED=False
+    gunicorn backend_core.wsgi -w 2 -b 127.0.0.1:8001
+    PORT=8002 WEB_CONCURRENCY=2 gunicorn -c gunicorn_asgi.conf.py backend_core.asgi:application
+
+then run
+
+    python benchmarks/loadtest.py \\
+        sync=http://127.0.0.1:8001/api/v1/properties/ \\
+        async=http://127.0.0.1:8002/api/v1/async/properties/ \\
+        --concurrency 64 --requests 2000
+
+Each target gets `--concurrency` clients issuing requests back to back
+on keep-alive connections; the report shows throughput and latency
+percentiles per target. Only the standard library is used.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_client(url, count, headers, latencies, errors, lock):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=60)
+    local_latencies, local_errors = [], 0
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = connection_class(parts.netloc, timeout=60)
+            continue
+        local_latencies.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def load_test(url, concurrency, requests, headers):
+    latencies, errors, lock = [], [0], threading.Lock()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for count in per_client:
+            pool.submit(run_client, url, count, headers, latencies, errors, lock)
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'requests': len(latencies) + errors[0],
+        'errors': errors[0],
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('targets', nargs='+', help='name=url pairs to compare')
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50, help='untimed requests per target first')
+    parser.add_argument('--token', help='JWT access token, to test the authenticated path')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    headers = {'Connection': 'keep-alive'}
+    if args.token:
+        headers['Authorization'] = f'Bearer {args.token}'
+
+    results = {}
+    for target in args.targets:
+        name, _, url = target.partition('=')
+        if args.warmup:
+            load_test(url, min(args.concurrency, args.warmup), args.warmup, headers)
+        results[name] = load_test(url, args.concurrency, args.requests, headers)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'target':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for name, result in results.items():
+        print(
+            f"{name:<10} {result['requests_per_second']:>9} {result['p50_ms']:>9} "
+            f"{result['p95_ms']:>9} {result['errors']:>7}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Gunicorn launch profile for serving the API over ASGI with uvicorn workers.
+
+    gunicorn -c gunicorn_asgi.conf.py backend_core.asgi:application
+
+Each worker runs an event loop, so the async read endpoints
+(/api/v1/async/...) keep serving other requests while a query is in
+flight instead of tying up a whole sync worker per request. Sync views
+still work; Django runs them in a thread pool.
+
+Every setting can be overridden from the environment (e.g. on Render):
+WEB_CONCURRENCY, PORT, GUNICORN_TIMEOUT, GUNICORN_KEEPALIVE.
+"""
+import multiprocessing
+import os
+
+# Persistent connections are per thread, and under ASGI the queries run on
+# per-request executor threads, so kept connections pile up instead of being
+# reused. Close them after each request unless DB_CONN_MAX_AGE is set; use
+# DB_POOL=True for reuse. The workers inherit this environment.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = 'uvicorn_worker.UvicornWorker'
+# One event loop per core is enough; concurrency comes from the loop, not workers
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Restart workers now and then so a slow leak can't build up
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = "Deletes background jobs that finished more than JOBS_KEEP_DAYS ago."
+
+    def handle(self, *args, **options):
+        deleted = queue.prune()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished jobs."))
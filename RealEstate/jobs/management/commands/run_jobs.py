@@ -0,0 +1,30 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs until stopped (SIGINT/SIGTERM finish the running jobs first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=getattr(settings, 'JOBS_CONCURRENCY', 4),
+            help="Jobs run at the same time, each on its own thread and database connection.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'JOBS_POLL_INTERVAL', 1.0),
+            help="Seconds between polls of an empty queue.",
+        )
+        parser.add_argument('--once', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        worker = Worker(max(1, options['concurrency']), options['poll_interval'])
+        if not options['once']:
+            signal.signal(signal.SIGINT, worker.stop)
+            signal.signal(signal.SIGTERM, worker.stop)
+            self.stdout.write(f"Running jobs with {worker.concurrency} threads.")
+        processed = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f"Ran {processed} jobs."))
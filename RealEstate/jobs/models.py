@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    One queued call of a background task (see queue.py), run by
+    `manage.py run_jobs`. The table is the queue: jobs are inserted in the
+    transaction of the write that needs them and only become visible to
+    workers when it commits, with no broker to run or keep in sync.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    # Dotted path of the @task function
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    # Enqueuing a key that is already waiting to run is a no-op
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Not run before this; pushed back after each failed attempt
+    run_at = models.DateTimeField(default=timezone.now)
+    # When a worker claimed it; a job running for longer than the lease
+    # belongs to a worker that died and is claimed again
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The workers' poll: due jobs in run_at order
+            models.Index(fields=['status', 'run_at'], name='job_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
@@ -0,0 +1,130 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+# --- Defining and queueing tasks ---
+def task(func=None, *, max_attempts=None):
+    """
+    Registers a function as a background task and adds
+    `func.enqueue(*args, key=None, delay=0)`. Arguments are stored as JSON.
+    Tasks may run more than once (a retry after a partial failure, a
+    worker that died mid-job), so they must be safe to repeat.
+    """
+    def register(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.enqueue = partial(enqueue, func)
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(func, *args, key=None, delay=0):
+    """
+    Queues func(*args) for a worker. Inside a transaction the job commits
+    or rolls back with the write that queued it. With a key, queueing
+    again while a job with that key is still waiting is a no-op; one
+    already running doesn't count, as it may have missed the new work.
+    """
+    job = Job(
+        task=func.task_name, args=list(args), idempotency_key=key,
+        max_attempts=func.max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    # One INSERT ... ON CONFLICT DO NOTHING, no savepoint
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+
+
+# --- Running ---
+def lease_cutoff(now):
+    return now - timedelta(seconds=getattr(settings, 'JOBS_LEASE_SECONDS', 600))
+
+
+def claim(limit):
+    """
+    Marks up to `limit` due jobs as running and returns them. Each claim is
+    a conditional UPDATE that only one worker can win, so concurrent
+    workers never run the same job, on any database backend.
+    """
+    now = timezone.now()
+    due = Q(status=Job.Status.QUEUED, run_at__lte=now) | Q(status=Job.Status.RUNNING, locked_at__lt=lease_cutoff(now))
+    candidates = Job.objects.filter(due).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in candidates
+        if Job.objects.filter(due, pk=pk).update(
+            status=Job.Status.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def run(job):
+    """Runs a claimed job in one transaction and records the outcome."""
+    try:
+        func = import_string(job.task)
+        if getattr(func, 'task_name', None) != job.task:
+            raise ImportError(f'{job.task} is not a task')
+        with transaction.atomic():
+            func(*job.args)
+    except Exception:
+        fail(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.Status.DONE, finished_at=timezone.now(), last_error='')
+    return True
+
+
+def retry_delay(attempts):
+    """Exponential backoff, with jitter so jobs that failed together don't retry together."""
+    base = getattr(settings, 'JOBS_RETRY_DELAY', 5)
+    delay = min(getattr(settings, 'JOBS_RETRY_MAX_DELAY', 600), base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+def fail(job, error):
+    now = timezone.now()
+    if job.attempts >= job.max_attempts:
+        logger.error('Job %s (%s) failed after %d attempts:\n%s', job.pk, job.task, job.attempts, error)
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, finished_at=now, last_error=error)
+        return
+    logger.warning('Job %s (%s) failed, attempt %d of %d:\n%s', job.pk, job.task, job.attempts, job.max_attempts, error)
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.QUEUED, locked_at=None, last_error=error,
+                run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+            )
+    except IntegrityError:
+        # The same key was queued again meanwhile; that job does the work
+        Job.objects.filter(pk=job.pk).delete()
+
+
+def run_pending():
+    """
+    Runs every due job in this thread until none is left, for tests and
+    one-off use. Returns the number of jobs run.
+    """
+    count = 0
+    while jobs := claim(100):
+        for job in jobs:
+            run(job)
+        count += len(jobs)
+    return count
+
+
+def prune():
+    """Deletes jobs that finished more than JOBS_KEEP_DAYS ago; failed ones are kept."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'JOBS_KEEP_DAYS', 7))
+    deleted, _ = Job.objects.filter(status=Job.Status.DONE, finished_at__lt=cutoff).delete()
+    return deleted
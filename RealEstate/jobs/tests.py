@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+from .worker import Worker
+
+calls = []
+
+
+@queue.task
+def record(value):
+    calls.append(value)
+
+
+@queue.task(max_attempts=2)
+def flaky(value):
+    calls.append(value)
+    if calls.count(value) < 2:
+        raise RuntimeError('try again')
+
+
+@queue.task(max_attempts=1)
+def broken():
+    Job.objects.create(task='written.then.rolled.back')
+    raise RuntimeError('broken')
+
+
+def not_a_task():
+    pass
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def make_due(self):
+        Job.objects.filter(status=Job.Status.QUEUED).update(run_at=timezone.now())
+
+    def test_runs_queued_jobs_in_order(self):
+        record.enqueue('a')
+        record.enqueue('b', delay=60)
+        record.enqueue('c')
+        self.assertEqual(queue.run_pending(), 2)
+        self.assertEqual(calls, ['a', 'c'])
+        self.assertEqual(Job.objects.filter(status=Job.Status.DONE).count(), 2)
+        self.assertEqual(Job.objects.get(status=Job.Status.QUEUED).args, ['b'])
+
+    def test_idempotency_key_collapses_waiting_jobs(self):
+        record.enqueue('a', key='k')
+        record.enqueue('b', key='k')
+        self.assertEqual(Job.objects.count(), 1)
+        job, = queue.claim(10)
+        # A running job doesn't absorb new work
+        record.enqueue('c', key='k')
+        queue.run(job)
+        queue.run_pending()
+        self.assertEqual(calls, ['a', 'c'])
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        flaky.enqueue('x')
+        with self.assertLogs('jobs', 'WARNING'):
+            queue.run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertIn('try again', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.make_due()
+        queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.Status.DONE, 2, ''))
+
+        with self.assertLogs('jobs', 'ERROR'):
+            broken.enqueue()
+            queue.run_pending()
+        job = Job.objects.get(task=broken.task_name)
+        self.assertEqual(job.status, Job.Status.FAILED)
+        # The task's writes were rolled back
+        self.assertFalse(Job.objects.filter(task='written.then.rolled.back').exists())
+
+    def test_retry_delay_grows_and_is_capped(self):
+        with mock.patch('random.uniform', lambda low, high: high):
+            self.assertEqual([queue.retry_delay(n) for n in (1, 2, 3)], [5, 10, 20])
+            self.assertEqual(queue.retry_delay(30), 600)
+
+    def test_unregistered_functions_are_not_run(self):
+        Job.objects.create(task=f'{__name__}.not_a_task', max_attempts=1)
+        with self.assertLogs('jobs', 'ERROR'):
+            queue.run_pending()
+        self.assertIn('is not a task', Job.objects.get().last_error)
+
+    def test_claims_are_exclusive_and_lost_jobs_are_reclaimed(self):
+        record.enqueue('a')
+        self.assertEqual(len(queue.claim(10)), 1)
+        self.assertEqual(queue.claim(10), [])
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        job, = queue.claim(10)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOBS_KEEP_DAYS=1)
+    def test_prune_keeps_recent_and_failed_jobs(self):
+        old = timezone.now() - timedelta(days=2)
+        Job.objects.create(task='t', status=Job.Status.DONE, finished_at=old)
+        Job.objects.create(task='t', status=Job.Status.FAILED, finished_at=old)
+        Job.objects.create(task='t', status=Job.Status.DONE, finished_at=timezone.now())
+        out = StringIO()
+        call_command('prune_jobs', stdout=out)
+        self.assertIn('Deleted 1 finished jobs', out.getvalue())
+        self.assertEqual(Job.objects.count(), 2)
+
+
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_pool_runs_every_job_once(self):
+        for i in range(20):
+            record.enqueue(i)
+        self.assertEqual(Worker(concurrency=4, poll_interval=0.01).run(once=True), 20)
+        self.assertEqual(sorted(calls), list(range(20)))
+
+    def test_command_drains_the_queue(self):
+        record.enqueue('a')
+        out = StringIO()
+        call_command('run_jobs', '--once', '--concurrency=1', stdout=out)
+        self.assertEqual(calls, ['a'])
+        self.assertIn('Ran 1 jobs', out.getvalue())
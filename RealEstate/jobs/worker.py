@@ -0,0 +1,55 @@
+import threading
+from concurrent import futures
+
+from django.db import close_old_connections
+
+from . import queue
+
+
+class Worker:
+    """
+    Claims due jobs and runs them on a pool of `concurrency` threads,
+    topping the pool up as jobs finish. Polls every `poll_interval`
+    seconds while the queue is empty. stop() finishes the running jobs
+    and returns.
+    """
+
+    def __init__(self, concurrency, poll_interval):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def execute(self, job):
+        # Pool threads open their own connections; recycle them like requests do
+        close_old_connections()
+        try:
+            return queue.run(job)
+        finally:
+            close_old_connections()
+
+    def run(self, once=False):
+        """Runs until stop(); with once, until the queue has no due job left."""
+        processed = 0
+        running = set()
+        with futures.ThreadPoolExecutor(self.concurrency, thread_name_prefix='job') as pool:
+            while not self.stopping.is_set():
+                free = self.concurrency - len(running)
+                jobs = queue.claim(free) if free else []
+                running |= {pool.submit(self.execute, job) for job in jobs}
+                processed += len(jobs)
+                if not running:
+                    if once:
+                        break
+                    close_old_connections()
+                    self.stopping.wait(self.poll_interval)
+                elif len(jobs) < free or not free:
+                    # Queue drained or pool full: wait for a slot
+                    _, running = futures.wait(
+                        running, self.poll_interval, return_when=futures.FIRST_COMPLETED,
+                    )
+                else:
+                    running = {future for future in running if not future.done()}
+        return processed
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class PropertyDetailsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'property_details'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self)
+
+        # Register model signal handlers
+        from . import signals  # noqa: F401
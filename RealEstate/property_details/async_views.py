@@ -0,0 +1,169 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.http import require_GET
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, permissions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from backend_core.throttling import SignatureThrottle
+from . import events
+from .models import Property
+from .replicas import aread_alias, reading_from
+from .views import PropertyViewSet, signature_response
+
+
+# --- Async base view ---
+class AsyncAPIView(View):
+    """
+    A small async counterpart of DRF's APIView for read endpoints:
+    authentication, permission checks, throttling, DRF exception handling
+    and JSON rendering. Handlers are coroutines returning a DRF Response.
+    Content negotiation is not supported.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    renderer_class = JSONRenderer
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated, like every APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        self.request = request
+        try:
+            # A cold user-state cache means a database query, so resolve
+            # the user in a worker thread rather than on the event loop
+            await sync_to_async(lambda: request.user)()
+            self.check_permissions(request)
+            # The counter store may be a network cache
+            await sync_to_async(self.check_throttles)(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(response)
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if not request.successful_authenticator and request.user.is_anonymous:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def check_throttles(self, request):
+        waits = [
+            throttle.wait() for throttle in [throttle() for throttle in self.throttle_classes]
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(max(waits))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = self.request.authenticators
+            header = authenticators[0].authenticate_header(self.request) if authenticators else None
+            if header:
+                exc.auth_header = header
+            else:
+                exc.status_code = 403
+        response = exception_handler(exc, {'view': self, 'request': self.request})
+        if response is None:
+            raise exc
+        return response
+
+    def finalize_response(self, response):
+        if isinstance(response, Response):
+            response.accepted_renderer = self.renderer_class()
+            response.accepted_media_type = self.renderer_class.media_type
+            response.renderer_context = {'view': self, 'request': self.request}
+            response.render()
+        return response
+
+
+# --- Property reads ---
+class AsyncPropertyView(AsyncAPIView):
+    """
+    Async list (`/async/properties/`) and detail (`/async/properties/<pk>/`)
+    for properties. Querysets, filters, serializers, pagination and the
+    anonymous response cache all come from PropertyViewSet; only the
+    database round trips differ (aiterator() / aget()), so under ASGI the
+    worker keeps serving other requests while a query runs.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    async def get(self, request, pk=None):
+        action = 'list' if pk is None else 'retrieve'
+        viewset = PropertyViewSet(
+            request=request, args=(), kwargs=self.kwargs, format_kwarg=None, action=action,
+        )
+        handler = partial(getattr(self, action), viewset)
+        with reading_from(await aread_alias(request)):
+            return await viewset.acached_response(handler, request, *self.args, **self.kwargs)
+
+    async def list(self, viewset, request):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        page = await viewset.paginator.apaginate_queryset(queryset, request, view=viewset)
+        serializer = viewset.get_serializer(page, many=True)
+        return viewset.paginator.get_paginated_response(serializer.data)
+
+    async def retrieve(self, viewset, request, pk):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        try:
+            instance = await queryset.aget(pk=pk)
+        except Property.DoesNotExist:
+            raise Http404
+        return Response(viewset.get_serializer(instance).data)
+
+
+# --- Cloudinary signature ---
+class AsyncCloudinarySignatureView(AsyncAPIView):
+    """Async counterpart of GenerateCloudinarySignatureView."""
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SignatureThrottle]
+
+    async def post(self, request, *args, **kwargs):
+        # Reads and writes the signature cache, which may be on the network
+        return await sync_to_async(signature_response)(request)
+
+
+# --- Live listing events ---
+@require_GET
+async def property_events(request):
+    """
+    Server-Sent Events stream of public listing changes: `created`,
+    `status` and `deleted` events for active listings (see events.py).
+    Subscribe to ?city=<city>&state=<state>, ?state=<state>,
+    ?property=<id>[,<id>...], or nothing for all. One long-lived
+    connection replaces polling the listing; on reconnect, catch up with
+    /properties/changes/. Needs the ASGI server (gunicorn_asgi.conf.py):
+    under WSGI the endless stream would be buffered whole, holding a
+    worker forever without sending a byte, so it answers 501 there.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Live events need the ASGI server.'}, status=501)
+    try:
+        keys = events.subscription_keys(request.GET)
+    except ValueError:
+        return JsonResponse(
+            {'detail': 'Subscribe with property=<ids>, city and state, or state.'}, status=400,
+        )
+    if len(events.hub) >= getattr(settings, 'PROPERTY_EVENTS_MAX_SUBSCRIBERS', 1000):
+        return JsonResponse({'detail': 'Too many live connections, try again later.'}, status=503)
+    events.get_broker().start()
+    response = StreamingHttpResponse(events.stream(keys), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import changes, dashboard, events, facets, market, tasks
+from .cache import bump_generation
+from .models import Property, PropertyImage
+from .serializers import PropertySerializer, new_image, unique_images
+
+# Rows validated and written per transaction
+CHUNK_SIZE = 500
+
+EXPORT_FIELDS = (
+    'id', 'address', 'city', 'state', 'zip_code', 'latitude', 'longitude', 'price', 'bedrooms',
+    'bathrooms', 'size', 'description', 'status', 'created_at', 'updated_at',
+    'image_urls',
+)
+
+
+class InvalidRow:
+    """Placeholder yielded by the parsers for a line that can't be decoded."""
+    def __init__(self, message):
+        self.message = message
+
+
+# --- Streaming parsers ---
+# Both return a generator, so rows are read from the request body as the
+# import consumes them instead of loading the whole upload into memory.
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            raise ParseError('Empty request body.')
+        return self.rows(stream)
+
+    def rows(self, stream):
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield InvalidRow(f'Invalid JSON: {exc}')
+                continue
+            yield row if isinstance(row, dict) else InvalidRow('Each line must be a JSON object.')
+
+
+class CSVParser(BaseParser):
+    """
+    One property per row with a header line.
+    `image_urls` holds whitespace-separated URLs.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            raise ParseError('Empty request body.')
+        return self.rows(stream)
+
+    def rows(self, stream):
+        lines = (line.decode('utf-8') for line in stream)
+        for row in csv.DictReader(lines):
+            row = {key: value for key, value in row.items() if key and value not in (None, '')}
+            if 'image_urls' in row:
+                row['image_urls'] = row['image_urls'].split()
+            yield row
+
+
+# --- Export renderers ---
+# Selected with ?format=ndjson / ?format=csv. The export itself streams;
+# these only render error payloads (e.g. a 404 for an unknown filter).
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=JSONEncoder) + '\n').encode(self.charset)
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+# --- Import ---
+def import_properties(rows, owner, context):
+    """
+    Validates rows with PropertySerializer rules and writes the valid ones
+    with bulk_create, one transaction per chunk. Invalid rows are reported
+    and skipped instead of aborting the batch.
+    """
+    created, errors = 0, []
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, CHUNK_SIZE))
+        if not chunk:
+            break
+        valid = []
+        for line, row in chunk:
+            if isinstance(row, InvalidRow):
+                errors.append({'row': line, 'errors': {'non_field_errors': [row.message]}})
+                continue
+            serializer = PropertySerializer(data=row, context=context)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                errors.append({'row': line, 'errors': serializer.errors})
+        if valid:
+            created += write_chunk(valid, owner)
+    return {'created': created, 'failed': len(errors), 'errors': errors}
+
+
+def write_chunk(rows, owner):
+    image_lists = [unique_images(row.pop('image_urls', [])) for row in rows]
+    properties = [Property(owner=owner, **row) for row in rows]
+    for prop in properties:
+        # bulk_create() skips save()
+        prop.update_geohash()
+    with transaction.atomic():
+        properties = Property.objects.bulk_create(properties)
+        images = PropertyImage.objects.bulk_create([
+            new_image(prop, image, position)
+            for prop, prop_images in zip(properties, image_lists)
+            for position, image in enumerate(prop_images)
+        ])
+        # bulk_create sends no model signals
+        facets.record_created(properties)
+        dashboard.record_created(properties, images)
+        changes.record_created(properties)
+        market.record_created(properties)
+        events.publish_created(properties)
+        if images:
+            tasks.build_image_manifests.enqueue(sorted({image.property_id for image in images}))
+        bump_generation()
+    return len(properties)
+
+
+# --- Export ---
+def export_row(prop):
+    row = {field: getattr(prop, field) for field in EXPORT_FIELDS[:-1]}
+    # Same string forms as the JSON API
+    row['price'] = str(prop.price)
+    row['bathrooms'] = str(prop.bathrooms)
+    row['created_at'] = prop.created_at.isoformat()
+    row['updated_at'] = prop.updated_at.isoformat()
+    row['image_urls'] = [image.image_url for image in prop.images.all()]
+    return row
+
+
+def stream_ndjson(queryset):
+    for prop in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield json.dumps(export_row(prop), cls=JSONEncoder) + '\n'
+
+
+def stream_csv(queryset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(EXPORT_FIELDS)
+    yield flush()
+    for prop in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row = export_row(prop)
+        row['image_urls'] = ' '.join(row['image_urls'])
+        writer.writerow([row[field] for field in EXPORT_FIELDS])
+        yield flush()
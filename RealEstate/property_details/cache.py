@@ -0,0 +1,170 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+GENERATION_KEY = 'property:generation'
+MODIFIED_KEY = 'property:modified'
+
+
+# --- Generation counter ---
+def get_generation():
+    """
+    Returns (generation, last_modified timestamp).
+    Every cached listing is keyed on the generation, so bumping it
+    invalidates all of them at once without tracking individual keys.
+    """
+    values = cache.get_many([GENERATION_KEY, MODIFIED_KEY])
+    generation = values.get(GENERATION_KEY)
+    modified = values.get(MODIFIED_KEY)
+    if generation is None:
+        modified = int(time.time())
+        cache.add(MODIFIED_KEY, modified, None)
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation, modified or int(time.time())
+
+
+async def aget_generation():
+    """get_generation() for async views; a network cache is not called from the event loop."""
+    values = await cache.aget_many([GENERATION_KEY, MODIFIED_KEY])
+    generation = values.get(GENERATION_KEY)
+    modified = values.get(MODIFIED_KEY)
+    if generation is None:
+        modified = int(time.time())
+        await cache.aadd(MODIFIED_KEY, modified, None)
+        await cache.aadd(GENERATION_KEY, 1, None)
+        generation = await cache.aget(GENERATION_KEY, 1)
+    return generation, modified or int(time.time())
+
+
+def _bump():
+    # Last-Modified has one-second resolution; keep it strictly increasing
+    # so two writes within the same second can't produce a stale 304.
+    previous = cache.get(MODIFIED_KEY) or 0
+    cache.set(MODIFIED_KEY, max(int(time.time()), previous + 1), None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key expired or was evicted; start a new sequence
+        cache.set(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+def bump_generation():
+    """
+    Invalidates every cached property response.
+    Deferred until commit so no reader can cache pre-commit rows under
+    the new generation. Call this after bulk_create()/update(), which
+    don't send model signals.
+    """
+    transaction.on_commit(_bump)
+
+
+# --- Response caching ---
+def normalize_params(query_params):
+    """Sorted (key, value) pairs with blank values dropped."""
+    items = []
+    for key in sorted(query_params.keys()):
+        for value in sorted(query_params.getlist(key)):
+            value = value.strip()
+            if value:
+                items.append((key, value))
+    return items
+
+
+class AnonymousCacheMixin:
+    """
+    Caches list/retrieve responses for anonymous users, keyed on the
+    normalized query params and the current generation.
+    Responses carry ETag/Last-Modified so browsers can revalidate with
+    a 304 instead of downloading the body again.
+    """
+    cache_timeout = getattr(settings, 'PROPERTY_CACHE_TIMEOUT', 300)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        etag, modified, cache_key = self.cache_validators(request)
+        if self.is_not_modified(request, etag, modified):
+            return self.add_cache_headers(self.not_modified_response(), etag, modified)
+
+        data = cache.get(cache_key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(cache_key, response.data, self.cache_timeout)
+        else:
+            response = self.cached_data_response(data)
+        return self.add_cache_headers(response, etag, modified)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """cached_response() for async views; `handler` is a coroutine function."""
+        if request.user.is_authenticated:
+            return await handler(request, *args, **kwargs)
+
+        etag, modified, cache_key = await self.acache_validators(request)
+        if self.is_not_modified(request, etag, modified):
+            return self.add_cache_headers(self.not_modified_response(), etag, modified)
+
+        data = await cache.aget(cache_key)
+        if data is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await cache.aset(cache_key, response.data, self.cache_timeout)
+        else:
+            response = self.cached_data_response(data)
+        return self.add_cache_headers(response, etag, modified)
+
+    def cache_validators(self, request):
+        """(etag, last_modified, cache key) for the request's listing/detail."""
+        return self.validators_for(request, *get_generation())
+
+    async def acache_validators(self, request):
+        """cache_validators() for async views."""
+        return self.validators_for(request, *await aget_generation())
+
+    def validators_for(self, request, generation, modified):
+        raw_key = '|'.join([
+            request.get_host(), request.path,
+            '&'.join(f'{k}={v}' for k, v in normalize_params(request.query_params)),
+        ])
+        digest = hashlib.md5(raw_key.encode('utf-8')).hexdigest()
+        # The body for a given key only changes when the generation does
+        etag = f'W/"{generation}-{digest}"'
+        return etag, modified, f'property:response:{generation}:{digest}'
+
+    def not_modified_response(self):
+        return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+    def cached_data_response(self, data):
+        return Response(data)
+
+    def is_not_modified(self, request, etag, modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and modified <= if_modified_since
+
+    def add_cache_headers(self, response, etag, modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        # Always revalidate; a 304 is cheap and never stale
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
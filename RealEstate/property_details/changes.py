@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import PropertyChange
+
+
+# --- Recording ---
+def record(property_ids, kind=PropertyChange.Kind.UPSERT):
+    PropertyChange.objects.bulk_create(
+        [PropertyChange(property_id=property_id, kind=kind) for property_id in property_ids]
+    )
+
+
+def record_created(instances):
+    """For bulk_create() callers, which get no model signals."""
+    record(prop.pk for prop in instances)
+
+
+def compact():
+    """
+    Deletes every change superseded by a newer one for the same property.
+    A client syncing from any token still gets the latest change of each
+    property written after it, so this never loses an update or a
+    tombstone. Returns the number of rows deleted.
+    """
+    newer = PropertyChange.objects.filter(property_id=OuterRef('property_id'), pk__gt=OuterRef('pk'))
+    deleted, _ = PropertyChange.objects.filter(Exists(newer)).delete()
+    return deleted
+
+
+# --- Reading ---
+def settle_seconds():
+    return getattr(settings, 'PROPERTY_CHANGES_SETTLE_SECONDS', 2)
+
+
+def settle_cutoff():
+    # Ids are handed out when a transaction inserts, not when it commits,
+    # so a just-written id can still be followed by a smaller one. Reading
+    # only changes older than the settle time keeps tokens gap-free as long
+    # as writing transactions are shorter than it.
+    return timezone.now() - timedelta(seconds=settle_seconds())
+
+
+def changes_since(since, limit):
+    """
+    Returns (changes, next_token, has_more) for up to `limit` log rows
+    after `since`, an index range scan on the primary key. Changes are
+    (token, property_id, kind), one per property (its latest), in token
+    order.
+    """
+    rows = list(
+        PropertyChange.objects.filter(pk__gt=since, created_at__lte=settle_cutoff())
+        .order_by('pk').values_list('pk', 'property_id', 'kind')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {property_id: (token, property_id, kind) for token, property_id, kind in rows}
+    next_token = rows[-1][0] if rows else since
+    return sorted(latest.values()), next_token, has_more
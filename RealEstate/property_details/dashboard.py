@@ -0,0 +1,104 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import OwnerSummary, Property, PropertyImage
+
+# OwnerSummary column counting each status
+STATUS_FIELDS = {status: f'{status}_count' for status in Property.PropertyStatus.values}
+
+
+def property_deltas(values, sign):
+    return {STATUS_FIELDS[values['status']]: sign, 'total_value': sign * Decimal(values['price'])}
+
+
+# --- Incremental maintenance ---
+def apply_deltas(owner_id, deltas, create=True):
+    """
+    Adds each delta to the owner's summary row; one UPDATE when the row
+    exists. Only writes that add a listing or image create the row:
+    removals may run while the owner itself is being deleted.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if OwnerSummary.objects.filter(owner_id=owner_id).update(**updates) or not create:
+        return
+    try:
+        with transaction.atomic():
+            OwnerSummary.objects.create(owner_id=owner_id, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        OwnerSummary.objects.filter(owner_id=owner_id).update(**updates)
+
+
+def record_change(old_values, new_values):
+    """Moves a listing's status and price between summaries (None = no listing)."""
+    deltas = defaultdict(Counter)
+    if old_values is not None:
+        deltas[old_values['owner_id']].update(property_deltas(old_values, -1))
+    if new_values is not None:
+        deltas[new_values['owner_id']].update(property_deltas(new_values, 1))
+    for owner_id, owner_deltas in deltas.items():
+        apply_deltas(owner_id, owner_deltas, create=new_values is not None)
+
+
+def record_image(property_id, delta):
+    """Counts an image added to or removed from a listing, by its property's owner."""
+    OwnerSummary.objects.filter(
+        owner__in=Property.objects.filter(pk=property_id).values('owner_id')
+    ).update(image_count=F('image_count') + delta)
+
+
+def record_images(owner_id, count):
+    """For PropertyImage bulk_create() callers, which get no model signals."""
+    apply_deltas(owner_id, {'image_count': count})
+
+
+def record_created(instances, images=()):
+    """For bulk_create() callers, which get no model signals."""
+    deltas = defaultdict(Counter)
+    for prop in instances:
+        deltas[prop.owner_id].update(property_deltas({'status': prop.status, 'price': prop.price}, 1))
+    for image in images:
+        deltas[image.property.owner_id]['image_count'] += 1
+    for owner_id, owner_deltas in deltas.items():
+        apply_deltas(owner_id, owner_deltas)
+
+
+def rebuild():
+    """Recomputes every owner summary from the property and image tables."""
+    summaries = {}
+    rows = (
+        Property.objects.order_by().values('owner_id', 'status')
+        .annotate(n=Count('id'), value=Sum('price'))
+    )
+    for row in rows:
+        summary = summaries.setdefault(row['owner_id'], OwnerSummary(owner_id=row['owner_id']))
+        setattr(summary, STATUS_FIELDS[row['status']], row['n'])
+        summary.total_value += row['value']
+    images = (
+        PropertyImage.objects.order_by().values(owner_id=F('property__owner_id'))
+        .annotate(n=Count('id'))
+    )
+    for row in images:
+        summaries[row['owner_id']].image_count = row['n']
+    with transaction.atomic():
+        OwnerSummary.objects.all().delete()
+        OwnerSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+    return len(summaries)
+
+
+# --- Reading ---
+def summary(owner):
+    row = OwnerSummary.objects.filter(owner=owner).first() or OwnerSummary(owner=owner)
+    return {
+        'total': sum(getattr(row, field) for field in STATUS_FIELDS.values()),
+        'status': {status: getattr(row, field) for status, field in STATUS_FIELDS.items()},
+        # Formatted like the serialized prices
+        'total_value': f'{row.total_value:.2f}',
+        'images': row.image_count,
+    }
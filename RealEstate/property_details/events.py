@@ -0,0 +1,238 @@
+import asyncio
+import json
+import threading
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Property
+
+# Events queued per subscriber before it counts as too slow and is dropped;
+# the client reconnects and catches up through /properties/changes/
+QUEUE_SIZE = 100
+
+
+def event_keys(event):
+    """The subscription keys an event is delivered to."""
+    return [
+        ('all',),
+        ('state', event['state']),
+        ('city', event['city'], event['state']),
+        ('property', event['id']),
+    ]
+
+
+def subscription_keys(params):
+    """
+    Subscription keys for the stream's query params: ?property=<id>[,<id>...],
+    ?city=<city>&state=<state>, ?state=<state>, or nothing for every event.
+    Raises ValueError for malformed params.
+    """
+    if params.get('property'):
+        return [('property', int(pk)) for pk in params['property'].split(',')]
+    if params.get('city'):
+        if not params.get('state'):
+            raise ValueError('city needs a state')
+        return [('city', params['city'], params['state'])]
+    if params.get('state'):
+        return [('state', params['state'])]
+    return [('all',)]
+
+
+def property_event(old_values, new_values, pk):
+    """
+    The public event for a listing write, or None. Only writes that a
+    visitor can see produce one: an active listing created or deleted, or
+    a status change into or out of active. Other fields aren't pushed;
+    clients refetch the listing if they need them.
+    """
+    active = Property.PropertyStatus.ACTIVE
+    if old_values is None:
+        kind, values = 'created', new_values
+    elif new_values is None:
+        kind, values = 'deleted', old_values
+    elif old_values['status'] != new_values['status']:
+        kind, values = 'status', new_values
+    else:
+        return None
+    if active not in {(old_values or {}).get('status'), (new_values or {}).get('status')}:
+        return None
+    event = {
+        'type': kind, 'id': pk, 'city': values['city'], 'state': values['state'],
+        'status': None if new_values is None else new_values['status'],
+        'price': str(values['price']),
+    }
+    if kind == 'status':
+        event['previous_status'] = old_values['status']
+    return event
+
+
+# --- In-process fan-out ---
+class Subscriber:
+    def __init__(self, keys):
+        self.keys = keys
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.dropped = False
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The stream sees the flag on its next read and closes
+            self.dropped = True
+
+
+class Hub:
+    """
+    Delivers events to this process's stream subscribers. Subscribers are
+    indexed by key, so an event costs a lookup per key of the event plus
+    one delivery per matching subscriber, not a scan of every connection.
+    Safe to publish from any thread; delivery happens on each subscriber's
+    event loop.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.connections = set()
+
+    def __len__(self):
+        return len(self.connections)
+
+    def subscribe(self, keys):
+        subscriber = Subscriber(keys)
+        with self.lock:
+            self.connections.add(subscriber)
+            for key in keys:
+                self.subscribers.setdefault(key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.connections.discard(subscriber)
+            for key in subscriber.keys:
+                group = self.subscribers.get(key)
+                if group is not None:
+                    group.discard(subscriber)
+                    if not group:
+                        del self.subscribers[key]
+
+    def dispatch(self, event):
+        with self.lock:
+            targets = set()
+            for key in event_keys(event):
+                targets |= self.subscribers.get(key, set())
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Its loop has shut down
+                self.unsubscribe(subscriber)
+
+
+hub = Hub()
+
+
+# --- Brokers: how an event reaches every process's hub ---
+class LocalBroker:
+    """Hands events straight to this process's hub: one process, dev and tests."""
+
+    def publish(self, event):
+        hub.dispatch(event)
+
+    def start(self):
+        pass
+
+
+class RedisBroker:
+    """
+    Publishes events on a Redis pub/sub channel (PROPERTY_EVENTS_REDIS_URL).
+    Each process listens in one background thread and feeds its own hub,
+    so every worker's subscribers see writes made by any worker.
+    Needs the `redis` package.
+    """
+    channel = 'property-events'
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker needs the redis package.') from exc
+        self.client = redis.Redis.from_url(settings.PROPERTY_EVENTS_REDIS_URL)
+        self.listener = None
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def start(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='property-events', daemon=True)
+                self.listener.start()
+
+    def listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            hub.dispatch(json.loads(message['data']))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'PROPERTY_EVENTS_BROKER', 'property_details.events.LocalBroker'))()
+
+
+def publish(event):
+    get_broker().publish(event)
+
+
+def publish_all(events):
+    for event in events:
+        publish(event)
+
+
+def publish_created(instances):
+    """For bulk_create() callers, which get no model signals; call inside their transaction."""
+    created = [
+        property_event(None, {field: getattr(prop, field) for field in Property.FACET_FIELDS}, prop.pk)
+        for prop in instances
+    ]
+    created = [event for event in created if event is not None]
+    if created:
+        transaction.on_commit(partial(publish_all, created))
+
+
+# --- Stream ---
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(keys):
+    """
+    Server-Sent Events for one subscription, with heartbeats to keep
+    proxies from timing out. Subscribes when the response starts
+    streaming and unsubscribes when the client goes away.
+    """
+    heartbeat = getattr(settings, 'PROPERTY_EVENTS_HEARTBEAT', 15)
+    subscriber = hub.subscribe(keys)
+    try:
+        # Reconnect after 5s; the comment flushes the headers right away
+        yield 'retry: 5000\n: connected\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if subscriber.dropped:
+                # Too slow: close so the client reconnects and resyncs
+                return
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscriber)
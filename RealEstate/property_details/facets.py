@@ -0,0 +1,165 @@
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Property, PropertyFacet
+
+# Lower edges of the price bands shown in the filter sidebar
+PRICE_BANDS = (0, 100000, 200000, 300000, 500000, 750000, 1000000, 2000000)
+# Bedroom counts at or above this share one "N+" bucket
+MAX_BEDROOM_BUCKET = 5
+
+DIMENSIONS = ('status', 'city', 'state', 'bedrooms_bucket', 'price_band')
+# Filter params the aggregate table can answer; anything else is counted live
+# (max_price is inclusive, so it never lines up with a band and is counted live)
+AGGREGATE_PARAMS = {'city', 'state', 'status', 'bedrooms', 'min_price'}
+
+
+def price_band(price):
+    return bisect_right(PRICE_BANDS, price) - 1
+
+
+def facet_key(prop):
+    return (
+        prop['status'], prop['city'], prop['state'],
+        min(prop['bedrooms'], MAX_BEDROOM_BUCKET), price_band(prop['price']),
+    )
+
+
+def property_values(instance):
+    return {field: getattr(instance, field) for field in Property.FACET_FIELDS}
+
+
+# --- Incremental maintenance ---
+def apply_deltas(deltas):
+    """Adds each delta to its aggregate row, creating rows as needed."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        lookup = dict(zip(DIMENSIONS, key))
+        # Rows exist for every combination seen so far, so this is usually one UPDATE
+        if PropertyFacet.objects.filter(**lookup).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                PropertyFacet.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # Another writer created the row first
+            PropertyFacet.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def record_change(old_values, new_values):
+    deltas = Counter()
+    if old_values is not None:
+        deltas[facet_key(old_values)] -= 1
+    if new_values is not None:
+        deltas[facet_key(new_values)] += 1
+    apply_deltas(deltas)
+
+
+def record_created(instances):
+    """For bulk_create() callers, which get no model signals."""
+    apply_deltas(Counter(facet_key(property_values(prop)) for prop in instances))
+
+
+def rebuild():
+    """Recomputes the whole aggregate table from the property table."""
+    rows = Property.objects.order_by().values(*Property.FACET_FIELDS).annotate(n=Count('id'))
+    counts = Counter()
+    for row in rows:
+        counts[facet_key(row)] += row['n']
+    with transaction.atomic():
+        PropertyFacet.objects.all().delete()
+        PropertyFacet.objects.bulk_create(
+            [PropertyFacet(count=count, **dict(zip(DIMENSIONS, key))) for key, count in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+# --- Reading ---
+def aggregate_filter(params):
+    """
+    Translates listing filter params into a PropertyFacet filter, or
+    returns None when some param can't be answered from the aggregate.
+    """
+    active = {key: value for key, value in params.items() if value not in (None, '')}
+    if set(active) - AGGREGATE_PARAMS:
+        return None
+    lookup = {}
+    for field in ('city', 'state', 'status'):
+        if field in active:
+            lookup[field] = active[field]
+    try:
+        if 'bedrooms' in active:
+            bedrooms = int(active['bedrooms'])
+            if bedrooms > MAX_BEDROOM_BUCKET:
+                return None
+            lookup['bedrooms_bucket__gte'] = bedrooms
+        if 'min_price' in active:
+            edge = Decimal(active['min_price'])
+            # Only a band edge maps onto whole bands
+            if edge not in PRICE_BANDS:
+                return None
+            lookup['price_band__gte'] = PRICE_BANDS.index(edge)
+    except (ValueError, InvalidOperation):
+        return None
+    return lookup
+
+
+def summarize(rows):
+    """Turns (dimension values, count) rows into per-facet counts."""
+    facets = {dimension: defaultdict(int) for dimension in DIMENSIONS}
+    total = 0
+    for row in rows:
+        total += row['count']
+        for dimension in DIMENSIONS:
+            facets[dimension][row[dimension]] += row['count']
+
+    def entries(counts, label=str):
+        return [
+            {'value': label(value), 'count': count}
+            for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+            if count > 0
+        ]
+
+    def band(index):
+        upper = PRICE_BANDS[index + 1] if index + 1 < len(PRICE_BANDS) else None
+        return {'min': PRICE_BANDS[index], 'max': upper}
+
+    return {
+        'total': total,
+        'status': entries(facets['status']),
+        'city': entries(facets['city']),
+        'state': entries(facets['state']),
+        'bedrooms': entries(
+            facets['bedrooms_bucket'],
+            lambda value: f'{value}+' if value == MAX_BEDROOM_BUCKET else str(value),
+        ),
+        'price': [
+            {**band(index), 'count': count}
+            for index, count in sorted(facets['price_band'].items()) if count > 0
+        ],
+    }
+
+
+def aggregate_rows(lookup, status):
+    return (
+        PropertyFacet.objects.filter(status=status, **lookup)
+        .values(*DIMENSIONS).annotate(count=Sum('count'))
+    )
+
+
+def live_rows(queryset):
+    """Groups a (filtered) property queryset by the facet dimensions."""
+    rows = (
+        queryset.select_related(None).prefetch_related(None).order_by()
+        .values(*Property.FACET_FIELDS).annotate(n=Count('id'))
+    )
+    counts = Counter()
+    for row in rows:
+        counts[facet_key(row)] += row['n']
+    return [dict(zip(DIMENSIONS, key), count=count) for key, count in counts.items()]
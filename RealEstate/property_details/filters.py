@@ -1,6 +1,45 @@
+import math
+
 import django_filters
+from django.db.models import Case, F, Q, When
+from rest_framework.exceptions import ValidationError
+from . import geo
 from .models import Property
-from django.db.models import Q
+from .search import search_properties
+
+
+def parse_floats(value, count, name):
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        raise ValidationError({name: f'Expected {count} comma-separated numbers.'})
+    return numbers
+
+
+def filter_by_box(queryset, west, south, east, north):
+    """
+    Keeps properties inside the box. The geohash prefixes narrow the scan
+    to a few index ranges; the coordinate bounds then trim the cell edges.
+    """
+    condition = Q()
+    for box_south, box_west, box_north, box_east in geo.split_bbox(west, south, east, north):
+        box = Q(
+            latitude__gte=box_south, latitude__lte=box_north,
+            longitude__gte=box_west, longitude__lte=box_east,
+        )
+        cells = geo.cover(box_south, box_west, box_north, box_east)
+        if len(cells) <= geo.MAX_COVER_CELLS:
+            prefixes = Q()
+            for cell in cells:
+                prefixes |= Q(geohash__startswith=cell)
+            box &= prefixes
+        condition |= box
+    return queryset.filter(condition)
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
 
 class PropertyFilter(django_filters.FilterSet):
     # Price range
@@ -17,14 +56,56 @@ class PropertyFilter(django_filters.FilterSet):
     # General location search (address, city, or state)
     location = django_filters.CharFilter(method='filter_by_location')
 
+    # Ranked full-text search over location and description
+    q = django_filters.CharFilter(method='filter_search')
+
+    # Map viewport: ?bbox=west,south,east,north (degrees)
+    bbox = django_filters.CharFilter(method='filter_bbox')
+
+    # Radius search: ?near=lat,lng&radius=<km>
+    near = django_filters.CharFilter(method='filter_near')
+    radius = django_filters.NumberFilter(method='filter_noop')
+
     class Meta:
         model = Property
         fields = ['city', 'state', 'zip_code', 'status', 'bedrooms']
 
     def filter_by_location(self, queryset, name, value):
-        # Case-insensitive search
-        return queryset.filter(
-            Q(address__icontains=value) |
-            Q(city__icontains=value) |
-            Q(state__icontains=value)
-        )
\ No newline at end of file
+        # Word/prefix match on the indexed location columns only
+        return search_properties(queryset, value, location_only=True)
+
+    def filter_bbox(self, queryset, name, value):
+        west, south, east, north = parse_floats(value, 4, name)
+        if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+            raise ValidationError({name: 'Expected west,south,east,north in degrees.'})
+        return filter_by_box(queryset, west, south, east, north)
+
+    def filter_near(self, queryset, name, value):
+        latitude, longitude = parse_floats(value, 2, name)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({name: 'Expected lat,lng in degrees.'})
+        radius = self.form.cleaned_data.get('radius')
+        radius = DEFAULT_RADIUS_KM if radius is None or radius <= 0 else min(float(radius), MAX_RADIUS_KM)
+
+        queryset = filter_by_box(queryset, *geo.radius_bbox(latitude, longitude, radius))
+        # Equirectangular distance: plain arithmetic, so it runs on any
+        # database and is accurate well beyond MAX_RADIUS_KM.
+        scale = math.cos(math.radians(latitude))
+        # Longitude difference wrapped into [-180, 180], so listings across
+        # the antimeridian are measured the short way round
+        dx = Case(
+            When(longitude__gt=longitude + 180, then=F('longitude') - (longitude + 360)),
+            When(longitude__lt=longitude - 180, then=F('longitude') - (longitude - 360)),
+            default=F('longitude') - longitude,
+        ) * scale
+        dy = F('latitude') - latitude
+        limit = (radius / geo.KM_PER_DEGREE) ** 2
+        return queryset.alias(geo_distance=dx * dx + dy * dy).filter(geo_distance__lte=limit)
+
+    def filter_noop(self, queryset, name, value):
+        # Consumed by filter_near
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        # Annotates `search_rank`; the paginator then orders by relevance
+        return search_properties(queryset, value)
@@ -0,0 +1,85 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 9
+# Upper bound on the prefixes OR-ed together for one bounding box
+MAX_COVER_CELLS = 16
+KM_PER_DEGREE = 111.32
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    """Standard geohash: nearby points share a prefix, so a btree index
+    on the hash answers area queries with a few range scans."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees."""
+    total = 5 * precision
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def cover_precision(south, west, north, east, max_cells=MAX_COVER_CELLS):
+    """Finest precision whose cells cover the box in at most max_cells."""
+    for precision in range(MAX_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor((north + 90) / height) - math.floor((south + 90) / height) + 1
+        cols = math.floor((east + 180) / width) - math.floor((west + 180) / width) + 1
+        if rows * cols <= max_cells:
+            return precision
+    return 1
+
+
+def cover(south, west, north, east, precision=None):
+    """Geohash prefixes whose cells together cover the bounding box."""
+    if precision is None:
+        precision = cover_precision(south, west, north, east)
+    height, width = cell_size(precision)
+    cells = set()
+    for row in range(math.floor((south + 90) / height), math.floor((north + 90) / height) + 1):
+        latitude = min(-90 + (row + 0.5) * height, 90.0)
+        for col in range(math.floor((west + 180) / width), math.floor((east + 180) / width) + 1):
+            longitude = min(-180 + (col + 0.5) * width, 180.0)
+            cells.add(encode(latitude, longitude, precision))
+    return sorted(cells)
+
+
+def split_bbox(west, south, east, north):
+    """Splits a box crossing the antimeridian into two that don't."""
+    if west <= east:
+        return [(south, west, north, east)]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Bounding box (west, south, east, north) around a circle."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    if dlng >= 180:
+        return -180.0, south, 180.0, north
+    west, east = longitude - dlng, longitude + dlng
+    # Wrap longitudes so split_bbox can handle the antimeridian
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return west, south, east, north
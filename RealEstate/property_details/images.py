@@ -0,0 +1,65 @@
+import re
+
+# Responsive widths served for every image, as c_limit transformations so
+# the aspect ratio is kept and an image is never upscaled
+VARIANT_WIDTHS = {'thumb': 160, 'card': 480, 'full': 1600}
+# Preferred first; browsers pick the first <source> type they support
+FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+# A ~24px blurred copy shown while the real image loads
+PLACEHOLDER_TRANSFORMATION = 'c_limit,w_24/e_blur:200,q_auto:low,f_webp'
+
+# https://res.cloudinary.com/<cloud>/image/upload/[<transformations>/][v<version>/]<public id>
+CLOUDINARY_UPLOAD = re.compile(
+    r'^(?P<base>https?://res\.cloudinary\.com/[^/]+/image/upload/)'
+    r'(?:(?:[a-z]{1,3}_[^/]*)/)*'
+    r'(?P<rest>(?:v\d+/)?.+)$'
+)
+
+
+def transformed_url(match, transformation):
+    # Any transformation already in the stored URL is replaced, not stacked
+    return f"{match['base']}{transformation}/{match['rest']}"
+
+
+def variant_width(target, original_width):
+    return min(target, original_width) if original_width else target
+
+
+def build_manifest(image_url, width=None, height=None):
+    """
+    srcset-ready variants of a Cloudinary image:
+
+        {'width', 'height', 'placeholder',
+         'variants': {'thumb': {'width', 'avif', 'webp'}, 'card': ..., 'full': ...},
+         'sources': [{'type': 'image/avif', 'srcset': '<url> 160w, ...'}, ...]}
+
+    Computed once when the image is saved. Returns None for URLs not
+    served by Cloudinary, whose clients fall back to image_url.
+    """
+    match = CLOUDINARY_UPLOAD.match(image_url or '')
+    if match is None:
+        return None
+    variants = {}
+    for name, target in VARIANT_WIDTHS.items():
+        variant = {'width': variant_width(target, width)}
+        for extension, _ in FORMATS:
+            variant[extension] = transformed_url(match, f'c_limit,w_{target}/f_{extension},q_auto')
+        variants[name] = variant
+    return {
+        'width': width,
+        'height': height,
+        'placeholder': transformed_url(match, PLACEHOLDER_TRANSFORMATION),
+        'variants': variants,
+        'sources': [
+            {'type': media_type, 'srcset': srcset(variants, extension)}
+            for extension, media_type in FORMATS
+        ],
+    }
+
+
+def srcset(variants, extension):
+    # Small originals cap several variants at the same width; list each once
+    by_width = {}
+    for variant in variants.values():
+        by_width.setdefault(variant['width'], variant[extension])
+    return ', '.join(f'{url} {width}w' for width, url in by_width.items())
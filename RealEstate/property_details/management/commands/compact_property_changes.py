@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from property_details import changes
+
+
+class Command(BaseCommand):
+    help = "Deletes property change-log rows superseded by a newer change of the same property."
+
+    def handle(self, *args, **options):
+        deleted = changes.compact()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} superseded changes."))
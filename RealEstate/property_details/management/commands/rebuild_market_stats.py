@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from property_details import market
+
+
+class Command(BaseCommand):
+    help = "Recomputes the MarketStats rollups from the whole price history."
+
+    def handle(self, *args, **options):
+        rows = market.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} market stats rows."))
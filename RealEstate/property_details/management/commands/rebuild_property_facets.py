@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from property_details import facets
+
+
+class Command(BaseCommand):
+    help = "Recomputes the PropertyFacet aggregate from the property table."
+
+    def handle(self, *args, **options):
+        rows = facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} facet rows."))
@@ -0,0 +1,122 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from property_details import changes, dashboard, facets, market
+from property_details.cache import bump_generation
+from property_details.models import Property, PropertyImage
+
+# Benchmark login (see benchmarks/api_benchmark.py)
+BENCHMARK_EMAIL = 'bench@example.com'
+BENCHMARK_PASSWORD = 'bench-password'
+
+# (city, state, latitude, longitude)
+CITIES = (
+    ('Springfield', 'IL', 39.78, -89.65), ('Chicago', 'IL', 41.88, -87.63),
+    ('Austin', 'TX', 30.27, -97.74), ('Houston', 'TX', 29.76, -95.37),
+    ('Denver', 'CO', 39.74, -104.99), ('Seattle', 'WA', 47.61, -122.33),
+    ('Portland', 'OR', 45.52, -122.68), ('Miami', 'FL', 25.76, -80.19),
+    ('Boston', 'MA', 42.36, -71.06), ('Phoenix', 'AZ', 33.45, -112.07),
+)
+STREETS = ('Main', 'Oak', 'Maple', 'Cedar', 'Elm', 'Pine', 'Lake', 'Hill', 'Park', 'River')
+FEATURES = (
+    'pool', 'garage', 'garden', 'fireplace', 'renovated kitchen', 'hardwood floors',
+    'basement', 'balcony', 'sea view', 'solar panels', 'walk-in closet', 'patio',
+)
+# Typical camera/phone originals, landscape and portrait
+IMAGE_SIZES = ((4032, 3024), (2048, 1536), (1600, 1200), (3024, 4032))
+STATUSES = (
+    [Property.PropertyStatus.ACTIVE] * 8
+    + [Property.PropertyStatus.PENDING, Property.PropertyStatus.SOLD]
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds realistic properties (with 0..N images each) for benchmarks. "
+        "Writes with bulk_create, so 100k rows take seconds, not hours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=100000)
+        parser.add_argument('--owners', type=int, default=500)
+        parser.add_argument('--max-images', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1, help='same seed, same data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        owners = self.create_owners(options['owners'])
+
+        created = 0
+        while created < options['properties']:
+            size = min(options['batch_size'], options['properties'] - created)
+            self.create_batch(rng, owners, size, options['max_images'])
+            created += size
+            self.stdout.write(f"{created}/{options['properties']} properties")
+
+        # bulk_create sends no model signals
+        facets.rebuild()
+        dashboard.rebuild()
+        market.rebuild()
+        bump_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created} properties for {len(owners)} owners. "
+            f"Benchmark login: {BENCHMARK_EMAIL} / {BENCHMARK_PASSWORD}"
+        ))
+
+    def create_owners(self, count):
+        User = get_user_model()
+        # Hashing is slow on purpose; every seeded user shares one hash
+        password = make_password(BENCHMARK_PASSWORD)
+        users = [
+            User(username=f'seed-user-{i}', email=f'seed-user-{i}@example.com', password=password)
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        User.objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={'username': 'bench', 'password': password},
+        )
+        return list(User.objects.filter(email__startswith='seed-user-').only('id'))
+
+    def create_batch(self, rng, owners, size, max_images):
+        properties = []
+        for _ in range(size):
+            city, state, latitude, longitude = rng.choice(CITIES)
+            bedrooms = rng.choice((1, 2, 2, 3, 3, 3, 4, 4, 5, 6))
+            prop = Property(
+                owner=rng.choice(owners),
+                address=f'{rng.randint(1, 9999)} {rng.choice(STREETS)} Street',
+                city=city, state=state, zip_code=f'{rng.randint(10000, 99999)}',
+                latitude=round(latitude + rng.uniform(-0.2, 0.2), 6),
+                longitude=round(longitude + rng.uniform(-0.2, 0.2), 6),
+                price=Decimal(rng.randrange(50000, 2500000, 1000)),
+                bedrooms=bedrooms,
+                bathrooms=Decimal(rng.choice(('1.0', '1.5', '2.0', '2.5', '3.0'))),
+                size=rng.randint(400, 600) * bedrooms,
+                description=f"{bedrooms} bedroom home in {city} with "
+                            + ', '.join(rng.sample(FEATURES, 3)) + '.',
+                status=rng.choice(STATUSES),
+            )
+            prop.update_geohash()
+            properties.append(prop)
+
+        with transaction.atomic():
+            properties = Property.objects.bulk_create(properties)
+            images = []
+            for prop in properties:
+                for position in range(rng.randint(0, max_images)):
+                    image = PropertyImage(
+                        property=prop, position=position,
+                        image_url=f'https://res.cloudinary.com/demo/image/upload/seed/{prop.pk}-{position}.jpg',
+                    )
+                    image.width, image.height = rng.choice(IMAGE_SIZES)
+                    image.update_manifest()
+                    images.append(image)
+            PropertyImage.objects.bulk_create(images)
+            changes.record_created(properties)
+            market.record_created(properties)
@@ -0,0 +1,273 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import DateField, Max, Min, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import changes
+from .models import MarketStats, Property, PropertyHistory
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SOLD = Property.PropertyStatus.SOLD
+# First row of a listing, and a transition into sold. A listing whose
+# first row is already sold (created sold, or backfilled by migration 0012
+# without its earlier statuses) has no known sale date, so it is no sale.
+NEW_LISTING = Q(previous_status__isnull=True, status__isnull=False)
+SALE = Q(status=SOLD, previous_status__isnull=False) & ~Q(previous_status=SOLD)
+# Listings and sales with the same id are looked up this many at a time
+CHUNK_SIZE = 1000
+# pg_advisory_xact_lock() key of lock_refresh(), any number no other lock uses
+REFRESH_LOCK_ID = 250001
+
+
+# --- Recording ---
+def history_row(values, pk, old_values=None):
+    return PropertyHistory(
+        property_id=pk, city=values['city'], state=values['state'], size=values['size'],
+        price=values['price'], status=values['status'],
+        previous_price=old_values and old_values['price'],
+        previous_status=old_values and old_values['status'],
+    )
+
+
+def record_change(old_values, new_values, pk):
+    """Appends a history row for a created or deleted listing, or a new price or status."""
+    if new_values is None:
+        row = history_row({**old_values, 'status': None}, pk, old_values)
+    elif old_values is None:
+        row = history_row(new_values, pk)
+    elif (old_values['price'], old_values['status']) != (new_values['price'], new_values['status']):
+        row = history_row(new_values, pk, old_values)
+    else:
+        return
+    row.save()
+    queue_refresh()
+
+
+def record_created(instances):
+    """For bulk_create() callers, which get no model signals."""
+    PropertyHistory.objects.bulk_create(
+        [history_row({field: getattr(prop, field) for field in Property.TRACKED_FIELDS}, prop.pk) for prop in instances],
+        batch_size=1000,
+    )
+    queue_refresh()
+
+
+def queue_refresh():
+    # tasks.py imports this module
+    from .tasks import refresh_market_stats
+    # Every write until it runs shares the waiting job; it starts once
+    # the rows are settled (see changes.settle_cutoff)
+    refresh_market_stats.enqueue(key='market-stats', delay=changes.settle_seconds())
+
+
+# --- Statistics ---
+def percentiles(values, points):
+    """
+    Linearly interpolated percentiles of `values` (NumPy's default
+    method), vectorized with NumPy when it is installed. None for no values.
+    """
+    if not values:
+        return [None] * len(points)
+    if numpy is not None:
+        return [float(value) for value in numpy.percentile(numpy.asarray(values, dtype=float), points)]
+    ordered = sorted(values)
+    results = []
+    for point in points:
+        position = (len(ordered) - 1) * point / 100
+        lower, upper = math.floor(position), math.ceil(position)
+        results.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return results
+
+
+def money(value):
+    return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+
+
+def per_sqft(rows):
+    return [float(row['price']) / row['size'] for row in rows if row['size']]
+
+
+def compute(key, listings, sales, listed_at, history_id):
+    """One MarketStats row from a group's new-listing and sale rows."""
+    state, city, month = key
+    list_p25, list_median, list_p75 = percentiles([float(row['price']) for row in listings], [25, 50, 75])
+    sale_prices = percentiles([float(row['price']) for row in sales], [10, 25, 50, 75, 90])
+    days = [
+        (row['recorded_at'] - listed_at[row['property_id']]).total_seconds() / 86400
+        for row in sales
+    ]
+    days_median, days_p90 = percentiles(days, [50, 90])
+    return MarketStats(
+        state=state, city=city, month=month, history_id=history_id,
+        new_listings=len(listings),
+        list_price_p25=money(list_p25), list_price_median=money(list_median), list_price_p75=money(list_p75),
+        list_price_per_sqft_median=money(percentiles(per_sqft(listings), [50])[0]),
+        sales=len(sales),
+        sale_price_p10=money(sale_prices[0]), sale_price_p25=money(sale_prices[1]),
+        sale_price_median=money(sale_prices[2]), sale_price_p75=money(sale_prices[3]),
+        sale_price_p90=money(sale_prices[4]),
+        sale_price_per_sqft_median=money(percentiles(per_sqft(sales), [50])[0]),
+        days_on_market_median=None if days_median is None else round(days_median, 1),
+        days_on_market_p90=None if days_p90 is None else round(days_p90, 1),
+    )
+
+
+def month_bounds(month):
+    # In the current time zone, like TruncMonth
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    end = timezone.make_aware(datetime(month.year + month.month // 12, month.month % 12 + 1, 1))
+    return start, end
+
+
+def listing_dates(property_ids):
+    """When each listing was first recorded: the start of its days on market."""
+    listed_at = {}
+    property_ids = sorted(property_ids)
+    for start in range(0, len(property_ids), CHUNK_SIZE):
+        rows = (
+            PropertyHistory.objects.filter(property_id__in=property_ids[start:start + CHUNK_SIZE])
+            .order_by().values('property_id').annotate(listed_at=Min('recorded_at'))
+        )
+        listed_at.update((row['property_id'], row['listed_at']) for row in rows)
+    return listed_at
+
+
+def compute_month(month, groups, history_id):
+    """
+    MarketStats rows for the touched (state, city) groups of one month,
+    city '' standing for the whole state. Reads the month's new-listing
+    and sale rows of the touched states in one query.
+    """
+    states = {state for state, _ in groups}
+    start, end = month_bounds(month)
+    rows = list(
+        PropertyHistory.objects.filter(NEW_LISTING | SALE, state__in=states, recorded_at__gte=start, recorded_at__lt=end)
+        .values('property_id', 'city', 'state', 'size', 'price', 'status', 'previous_status', 'recorded_at')
+    )
+    listings, sales = defaultdict(list), defaultdict(list)
+    for row in rows:
+        new_listing = row['previous_status'] is None
+        sale = row['status'] == SOLD and row['previous_status'] not in (None, SOLD)
+        for group in ((row['state'], row['city']), (row['state'], '')):
+            if group in groups:
+                if new_listing:
+                    listings[group].append(row)
+                if sale:
+                    sales[group].append(row)
+    listed_at = listing_dates({row['property_id'] for group in sales.values() for row in group})
+    return [
+        compute((state, city, month), listings[state, city], sales[state, city], listed_at, history_id)
+        for state, city in groups
+    ]
+
+
+def lock_refresh():
+    """
+    Holds the refresh lock until the transaction ends. A write during a
+    running refresh queues another one, which a second worker may start
+    before the first commits; both would recompute the same months, and the
+    older result committed last would overwrite the newer one for good.
+    PostgreSQL takes an advisory lock. SQLite needs none: it runs one
+    write transaction at a time, and one that read data committed over
+    meanwhile fails and is retried.
+    """
+    connection = connections['default']
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [REFRESH_LOCK_ID])
+
+
+def refresh(history=None):
+    """
+    Recomputes the MarketStats rows touched by history recorded since the
+    last refresh, up to the settle cutoff; `history` limits it to a
+    queryset (rebuild() passes all of it). Percentiles don't add up, so
+    each touched month of a city and of its state is recomputed from its
+    rows: the cost follows the new rows' months and places, not the size
+    of the history. Returns the number of rows written.
+
+    The default refresh runs as a keyed job, and enqueueing is a no-op while
+    one is queued, so rows written inside its settle window would wait for
+    the next unrelated write; it queues another pass for them instead.
+    Refreshes run one at a time (lock_refresh()).
+    """
+    with transaction.atomic():
+        lock_refresh()
+        if history is None:
+            after = MarketStats.objects.aggregate(last=Max('history_id'))['last'] or 0
+            history = PropertyHistory.objects.filter(pk__gt=after, recorded_at__lte=changes.settle_cutoff())
+            through = history.aggregate(last=Max('pk'))['last']
+            if PropertyHistory.objects.filter(pk__gt=through or after).exists():
+                queue_refresh()
+        else:
+            through = history.aggregate(last=Max('pk'))['last']
+        if through is None:
+            return 0
+        touched = defaultdict(set)
+        rows = (
+            history.filter(pk__lte=through).order_by()
+            .annotate(month=TruncMonth('recorded_at', output_field=DateField()))
+            .values_list('month', 'state', 'city').distinct()
+        )
+        for month, state, city in rows:
+            touched[month] |= {(state, city), (state, '')}
+        stats = [row for month, groups in sorted(touched.items()) for row in compute_month(month, groups, through)]
+        MarketStats.objects.bulk_create(
+            stats, batch_size=500, update_conflicts=True, unique_fields=['state', 'city', 'month'],
+            update_fields=[field.name for field in MarketStats._meta.concrete_fields
+                           if field.name not in ('id', 'state', 'city', 'month')],
+        )
+        return len(stats)
+
+
+def rebuild():
+    """Recomputes every MarketStats row from the whole history."""
+    with transaction.atomic():
+        lock_refresh()
+        MarketStats.objects.all().delete()
+        return refresh(PropertyHistory.objects.all())
+
+
+# --- Reading ---
+def monthly_stats(state, city='', start=None, end=None):
+    """The rollup rows of a city (or a whole state) by month, oldest first."""
+    rows = MarketStats.objects.filter(state=state, city=city).order_by('month')
+    if start is not None:
+        rows = rows.filter(month__gte=start)
+    if end is not None:
+        rows = rows.filter(month__lte=end)
+    return [represent(row) for row in rows]
+
+
+def price(value):
+    # Formatted like the serialized prices
+    return None if value is None else f'{value:.2f}'
+
+
+def represent(row):
+    return {
+        'month': f'{row.month:%Y-%m}',
+        'new_listings': {
+            'count': row.new_listings,
+            'price': {'p25': price(row.list_price_p25), 'median': price(row.list_price_median),
+                      'p75': price(row.list_price_p75)},
+            'price_per_sqft': {'median': price(row.list_price_per_sqft_median)},
+        },
+        'sales': {
+            'count': row.sales,
+            'price': {'p10': price(row.sale_price_p10), 'p25': price(row.sale_price_p25),
+                      'median': price(row.sale_price_median), 'p75': price(row.sale_price_p75),
+                      'p90': price(row.sale_price_p90)},
+            'price_per_sqft': {'median': price(row.sale_price_per_sqft_median)},
+            'days_on_market': {'median': row.days_on_market_median, 'p90': row.days_on_market_p90},
+        },
+    }
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:55
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from property_details.search import get_backend
+
+
+def install_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    backend.install(schema_editor)
+    backend.rebuild(schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    get_backend(schema_editor.connection).uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property_details', '0002_property_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property_details', '0005_propertyimage_position'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', 'position', 'id'], name='propertyimage_position_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:05
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from property_details.facets import DIMENSIONS, facet_key
+
+
+def populate_facets(apps, schema_editor):
+    Property = apps.get_model('property_details', 'Property')
+    PropertyFacet = apps.get_model('property_details', 'PropertyFacet')
+    counts = Counter()
+    rows = Property.objects.order_by().values('status', 'city', 'state', 'bedrooms', 'price').annotate(n=Count('id'))
+    for row in rows:
+        counts[facet_key(row)] += row['n']
+    PropertyFacet.objects.bulk_create(
+        [PropertyFacet(count=count, **dict(zip(DIMENSIONS, key))) for key, count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property_details', '0007_property_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('pending', 'Pending'), ('sold', 'Sold')], max_length=10)),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('bedrooms_bucket', models.PositiveSmallIntegerField()),
+                ('price_band', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'city', 'state', 'bedrooms_bucket', 'price_band'), name='unique_property_facet')],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
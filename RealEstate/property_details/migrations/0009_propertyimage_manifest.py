@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+from property_details.images import build_manifest
+
+
+def populate_manifests(apps, schema_editor):
+    PropertyImage = apps.get_model('property_details', 'PropertyImage')
+    images = list(PropertyImage.objects.only('id', 'image_url'))
+    for image in images:
+        image.manifest = build_manifest(image.image_url)
+    PropertyImage.objects.bulk_update(images, ['manifest'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property_details', '0008_propertyfacet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='manifest',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_manifests, migrations.RunPython.noop),
+    ]
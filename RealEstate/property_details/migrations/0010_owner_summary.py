@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_summaries(apps, schema_editor):
+    Property = apps.get_model('property_details', 'Property')
+    PropertyImage = apps.get_model('property_details', 'PropertyImage')
+    OwnerSummary = apps.get_model('property_details', 'OwnerSummary')
+    summaries = {}
+    rows = Property.objects.order_by().values('owner_id', 'status').annotate(n=Count('id'), value=Sum('price'))
+    for row in rows:
+        summary = summaries.setdefault(row['owner_id'], OwnerSummary(owner_id=row['owner_id']))
+        setattr(summary, f"{row['status']}_count", row['n'])
+        summary.total_value += row['value']
+    images = PropertyImage.objects.order_by().values(owner_id=F('property__owner_id')).annotate(n=Count('id'))
+    for row in images:
+        summaries[row['owner_id']].image_count = row['n']
+    OwnerSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User_details', '0001_initial'),
+        ('property_details', '0009_propertyimage_manifest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerSummary',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('sold_count', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('image_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', 'status', '-created_at', '-id'], name='property_owner_status_idx'),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
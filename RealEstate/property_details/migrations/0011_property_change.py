@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+def log_existing_properties(apps, schema_editor):
+    # One upsert per existing listing, so syncing from token 0 sees the whole catalog
+    Property = apps.get_model('property_details', 'Property')
+    PropertyChange = apps.get_model('property_details', 'PropertyChange')
+    pks = Property.objects.order_by('pk').values_list('pk', flat=True)
+    PropertyChange.objects.bulk_create(
+        [PropertyChange(property_id=pk, kind='upsert') for pk in pks], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property_details', '0010_owner_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property_id', 'id'], name='propertychange_property_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_properties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:58
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def record_existing_properties(apps, schema_editor):
+    # Earlier prices and statuses were never kept: each listing starts its
+    # history with its current price and status, dated when it was created.
+    # Listings already sold count as new listings but not as sales, since
+    # when they sold is unknown (see market.SALE).
+    Property = apps.get_model('property_details', 'Property')
+    PropertyHistory = apps.get_model('property_details', 'PropertyHistory')
+    Job = apps.get_model('jobs', 'Job')
+    rows = Property.objects.order_by('pk').values_list('pk', 'city', 'state', 'size', 'price', 'status')
+    PropertyHistory.objects.bulk_create([
+        PropertyHistory(property_id=pk, city=city, state=state, size=size, price=price, status=status)
+        for pk, city, state, size, price, status in rows
+    ], batch_size=1000)
+    PropertyHistory.objects.update(recorded_at=Subquery(
+        Property.objects.filter(pk=OuterRef('property_id')).values('created_at')[:1]
+    ))
+    if PropertyHistory.objects.exists():
+        # The worker rolls the backfill up into MarketStats
+        Job.objects.create(task='property_details.tasks.refresh_market_stats', idempotency_key='market-stats')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+        ('property_details', '0011_property_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=100)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('month', models.DateField()),
+                ('new_listings', models.PositiveIntegerField(default=0)),
+                ('list_price_p25', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('list_price_median', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('list_price_p75', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('list_price_per_sqft_median', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('sale_price_p10', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('sale_price_p25', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('sale_price_median', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('sale_price_p75', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('sale_price_p90', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('sale_price_per_sqft_median', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('days_on_market_median', models.FloatField(null=True)),
+                ('days_on_market_p90', models.FloatField(null=True)),
+                ('history_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Market stats',
+                'constraints': [models.UniqueConstraint(fields=('state', 'city', 'month'), name='unique_market_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.BigIntegerField()),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('size', models.PositiveIntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('pending', 'Pending'), ('sold', 'Sold')], max_length=10, null=True)),
+                ('previous_price', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('previous_status', models.CharField(choices=[('active', 'Active'), ('pending', 'Pending'), ('sold', 'Sold')], max_length=10, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Property history',
+                'indexes': [models.Index(fields=['property_id', 'recorded_at'], name='propertyhistory_property_idx'), models.Index(fields=['state', 'recorded_at'], name='propertyhistory_state_idx')],
+            },
+        ),
+        migrations.RunPython(record_existing_properties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def queue_rebuild(apps, schema_editor):
+    # Rows written before market.SALE stopped counting listings first
+    # recorded as sold; without rollups the next refresh recomputes them all
+    MarketStats = apps.get_model('property_details', 'MarketStats')
+    Job = apps.get_model('jobs', 'Job')
+    if MarketStats.objects.exists():
+        MarketStats.objects.all().delete()
+        if not Job.objects.filter(idempotency_key='market-stats', status='queued').exists():
+            Job.objects.create(task='property_details.tasks.refresh_market_stats', idempotency_key='market-stats')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+        ('property_details', '0012_property_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_rebuild, migrations.RunPython.noop),
+    ]
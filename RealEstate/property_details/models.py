@@ -1,5 +1,23 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.contrib.postgres.search import SearchVectorField
+
+from . import geo, images
+
+class PropertyQuerySet(models.QuerySet):
+    def with_cover_image(self):
+        """
+        Annotates `cover_image` with the URL of the first image by position,
+        and `cover_manifest` with its responsive variants.
+        Indexed subqueries per row instead of prefetching every image.
+        """
+        cover = PropertyImage.objects.filter(property=models.OuterRef('pk')).order_by('position', 'id')
+        return self.annotate(
+            cover_image=models.Subquery(cover.values('image_url')[:1]),
+            cover_manifest=models.Subquery(cover.values('manifest')[:1], output_field=models.JSONField()),
+        )
+
 
 class Property(models.Model):
     class PropertyStatus(models.TextChoices):
@@ -18,6 +36,15 @@ class Property(models.Model):
     city = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
     zip_code = models.CharField(max_length=20)
+
+    # Coordinates (optional) and their geohash, used for map/radius search
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
     
     # Details
     price = models.DecimalField(max_digits=12, decimal_places=2)
@@ -32,22 +59,67 @@ class Property(models.Model):
         default=PropertyStatus.ACTIVE
     )
     
+    # Full-text search document, maintained by a database trigger (see search.py).
+    # Only populated on PostgreSQL; SQLite uses an FTS5 table instead.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PropertyQuerySet.as_manager()
     
     class Meta:
         verbose_name_plural = "Properties"
-        ordering = ['-created_at']
+        # 'id' breaks ties so keyset pagination has a strict total order
+        ordering = ['-created_at', '-id']
         # Add indexes for common search fields
         indexes = [
             models.Index(fields=['city', 'state']),
             models.Index(fields=['price']),
+            # Matches the default ordering, used by keyset pagination
+            models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+            # One per visibility branch of the authenticated listing
+            models.Index(fields=['status', '-created_at', '-id'], name='property_status_created_idx'),
+            models.Index(fields=['owner', '-created_at', '-id'], name='property_owner_created_idx'),
+            # The owner dashboard filtered by status (/properties/mine/?status=)
+            models.Index(fields=['owner', 'status', '-created_at', '-id'], name='property_owner_status_idx'),
         ]
 
     def __str__(self):
         return self.address
 
+    # Fields tracked by the facet aggregate (see facets.py)
+    FACET_FIELDS = ('status', 'city', 'state', 'bedrooms', 'price')
+    # Stored values the write signals diff against: the facet fields, the
+    # owner for the owner summary (see dashboard.py) and the size for the
+    # price history (see market.py)
+    TRACKED_FIELDS = FACET_FIELDS + ('owner_id', 'size')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded tracked values so a later save can decrement
+        # the right aggregate rows without re-reading them
+        loaded = dict(zip(field_names, values))
+        if all(field in loaded for field in cls.TRACKED_FIELDS):
+            instance._tracked_values = {field: loaded[field] for field in cls.TRACKED_FIELDS}
+        return instance
+
+    def update_geohash(self):
+        # Called from save(); bulk_create() callers must call it themselves
+        if self.latitude is None or self.longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
 class PropertyImage(models.Model):
     property = models.ForeignKey(
         Property,
@@ -55,7 +127,181 @@ class PropertyImage(models.Model):
         related_name='images'
     )
     image_url = models.URLField(max_length=1024)
+    # Order the client submitted the images in (0 = cover photo)
+    position = models.PositiveIntegerField(default=0)
+    # Original dimensions, as reported by Cloudinary for the upload
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # Responsive variant URLs and placeholder derived from image_url (see images.py)
+    manifest = models.JSONField(null=True, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['position', 'id']
+        indexes = [
+            # Serves both the ordered prefetch and the cover image subquery
+            models.Index(fields=['property', 'position', 'id'], name='propertyimage_position_idx'),
+        ]
+
+    def __str__(self):
+        return f"Image for {self.property.address}"
+
+    def update_manifest(self):
+        # Called from save(); bulk_create() callers must call it themselves
+        self.manifest = images.build_manifest(self.image_url, self.width, self.height)
+
+    def save(self, *args, **kwargs):
+        self.update_manifest()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'image_url', 'width', 'height'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'manifest'}
+        super().save(*args, **kwargs)
+
+class PropertyFacet(models.Model):
+    """
+    Listing counts per combination of the sidebar filter dimensions.
+    Kept current by Property signals (see facets.py and signals.py), so
+    facet counts are a scan of this small table instead of GROUP BYs over
+    every property.
+    """
+    status = models.CharField(max_length=10, choices=Property.PropertyStatus.choices)
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    bedrooms_bucket = models.PositiveSmallIntegerField()
+    price_band = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'city', 'state', 'bedrooms_bucket', 'price_band'],
+                name='unique_property_facet',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.status} {self.city}, {self.state}: {self.count}"
+
+class OwnerSummary(models.Model):
+    """
+    Totals over one owner's listings for the dashboard header. Kept current
+    by Property and PropertyImage signals in the writing transaction (see
+    dashboard.py and signals.py), so /properties/mine/ reads one row by
+    primary key instead of aggregating the owner's listings.
+    """
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='listing_summary'
+    )
+    active_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    sold_count = models.IntegerField(default=0)
+    # Sum of the asking prices of all the owner's listings
+    total_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    image_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Listings of user {self.owner_id}"
+
+class PropertyChange(models.Model):
+    """
+    Append-only log of listing writes for incremental sync: one row per
+    property create/update/delete, image writes counting as an update of
+    their property. Written by signals in the writing transaction (see
+    changes.py); the auto-increment id is the sync token.
+    """
+    class Kind(models.TextChoices):
+        UPSERT = 'upsert', 'Upsert'
+        DELETE = 'delete', 'Delete'
+
+    # Not a foreign key: tombstones outlive their property
+    property_id = models.BigIntegerField()
+    kind = models.CharField(max_length=6, choices=Kind.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Compaction finds the newer changes of the same property
+            models.Index(fields=['property_id', 'id'], name='propertychange_property_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} of property {self.property_id}"
+
+class PropertyHistory(models.Model):
+    """
+    Append-only price and status history: a row when a listing is
+    created, when its price or status changes, and when it is deleted
+    (status None). Location and size are copied in, so market statistics
+    (see market.py) never join the live table and outlive deleted
+    listings. Written by signals in the writing transaction.
+    """
+    # Not a foreign key: history outlives its property
+    property_id = models.BigIntegerField()
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    size = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=10, choices=Property.PropertyStatus.choices, null=True)
+    # None on the listing's first row
+    previous_price = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    previous_status = models.CharField(max_length=10, choices=Property.PropertyStatus.choices, null=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Property history"
+        indexes = [
+            # A listing's history in order, and its listing date for days on market
+            models.Index(fields=['property_id', 'recorded_at'], name='propertyhistory_property_idx'),
+            # The rows of one month in one state, read by the rollup job
+            models.Index(fields=['state', 'recorded_at'], name='propertyhistory_state_idx'),
+        ]
+
+    def __str__(self):
+        return f"Property {self.property_id}: {self.status} at {self.price}"
+
+class MarketStats(models.Model):
+    """
+    Monthly market statistics for a city (or a whole state, city ''),
+    rolled up from PropertyHistory by the refresh_market_stats task (see
+    market.py). New listings are the month's first history rows; sales
+    are the month's transitions into sold, with days on market counted
+    from the listing's first row. The market-stats endpoint reads these
+    rows by their unique key instead of scanning the history.
+    """
+    state = models.CharField(max_length=100)
+    # '' for the whole state
+    city = models.CharField(max_length=100, blank=True)
+    # First day of the month
+    month = models.DateField()
+
+    new_listings = models.PositiveIntegerField(default=0)
+    list_price_p25 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    list_price_median = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    list_price_p75 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    list_price_per_sqft_median = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+
+    sales = models.PositiveIntegerField(default=0)
+    sale_price_p10 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    sale_price_p25 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    sale_price_median = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    sale_price_p75 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    sale_price_p90 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    sale_price_per_sqft_median = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    days_on_market_median = models.FloatField(null=True)
+    days_on_market_p90 = models.FloatField(null=True)
+
+    # Last PropertyHistory id this row has seen; the refresh job resumes
+    # after the highest one
+    history_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Market stats"
+        constraints = [
+            models.UniqueConstraint(fields=['state', 'city', 'month'], name='unique_market_stats'),
+        ]
+
     def __str__(self):
-        return f"Image for {self.property.address}"
\ No newline at end of file
+        return f"{self.city or 'All'}, {self.state} {self.month:%Y-%m}"
@@ -0,0 +1,61 @@
+from django.core.exceptions import FieldDoesNotExist
+
+
+def serializer_only_fields(serializer_class, queryset):
+    """
+    Works out which model columns a serializer actually reads, so the
+    queryset can load them with only().
+    Returns None when that can't be determined safely (e.g. a field with
+    source='*' or a model @property), in which case nothing is deferred.
+    """
+    model = queryset.model
+    select_related = set(getattr(serializer_class.Meta, 'select_related', ()))
+    only = {model._meta.pk.name}
+
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        parts = field.source.split('.')
+        if parts[0] in queryset.query.annotations:
+            continue
+        try:
+            model_field = model._meta.get_field(parts[0])
+        except FieldDoesNotExist:
+            return None
+        if model_field.one_to_many or model_field.many_to_many:
+            # Reverse relations come from prefetch_related
+            continue
+        if len(parts) > 1 and model_field.is_relation and parts[0] in select_related:
+            only.add('__'.join(parts[:2]))
+        else:
+            only.add(model_field.name)
+    return only
+
+
+def optimize_queryset(queryset, serializer_class):
+    """
+    Applies the relations a serializer declares in its Meta
+    (`select_related`, `prefetch_related`) plus an only() of the columns
+    it reads.
+    """
+    meta = serializer_class.Meta
+    if getattr(meta, 'select_related', None):
+        queryset = queryset.select_related(*meta.select_related)
+    if getattr(meta, 'prefetch_related', None):
+        queryset = queryset.prefetch_related(*meta.prefetch_related)
+    only = serializer_only_fields(serializer_class, queryset)
+    if only is not None:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class OptimizedQuerysetMixin:
+    """
+    Viewset mixin: get_queryset() implementations call optimize_queryset()
+    on their base queryset, so the joins and columns always match the
+    serializer used for the current action.
+    """
+    def optimize_queryset(self, queryset):
+        return optimize_queryset(queryset, self.get_serializer_class())
@@ -0,0 +1,179 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PropertyCursorPagination(BasePagination):
+    """
+    Keyset pagination over the (-created_at, -id) ordering of Property,
+    or (-search_rank, -id) for ranked `?q=` searches.
+
+    Instead of OFFSET, each page filters on the last row it returned, so
+    page 1000 costs the same index range scan as page 1.
+    The cursor is an opaque base64 token; clients should only follow
+    the `next` / `previous` links.
+
+    The view may also pass a list of disjoint querysets; each one is
+    paginated on its own and the pages are merged with UNION ALL.
+    """
+    ordering = ('-created_at', '-id')
+    # Used instead when a full-text search annotated the queryset
+    ranked_ordering = ('-search_rank', '-id')
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    page_size = 20
+    # Clients may ask for a smaller/larger page, up to max_page_size
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views; the page is fetched with aiterator()."""
+        page_queryset = self.page_queryset(queryset, request)
+        # chunk_size lets aiterator() honour prefetch_related()
+        return self.set_page([obj async for obj in page_queryset.aiterator(chunk_size=self.page_size + 1)])
+
+    def page_queryset(self, queryset, request):
+        """Builds the (not yet evaluated) query for the requested page."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        branches = queryset if isinstance(queryset, list) else [queryset]
+        self.key = self.get_ordering(branches[0])[0].lstrip('-')
+        self.cursor = self.decode_cursor(request)
+
+        # Fetch one extra row to know whether another page exists
+        limit = self.page_size + 1
+        queryset = self.combine(
+            [self.apply_cursor(branch, self.cursor) for branch in branches], limit
+        )
+        return queryset[:limit]
+
+    def set_page(self, results):
+        reverse = bool(self.cursor and self.cursor['reverse'])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_ordering(self, queryset):
+        if 'search_rank' in queryset.query.annotations:
+            return self.ranked_ordering
+        return self.ordering
+
+    def apply_cursor(self, queryset, cursor):
+        """
+        Order the queryset and keep only the rows after the cursor position.
+        The redundant bound on the leading key lets the database seek
+        straight into the composite index instead of scanning it.
+        """
+        key = self.key
+        if cursor is None:
+            return queryset.order_by('-' + key, '-id')
+
+        value, pk = cursor['value'], cursor['id']
+        if cursor['reverse']:
+            return queryset.filter(**{key + '__gte': value}).filter(
+                Q(**{key + '__gt': value}) | Q(**{key: value, 'id__gt': pk})
+            ).order_by(key, 'id')
+        return queryset.filter(**{key + '__lte': value}).filter(
+            Q(**{key + '__lt': value}) | Q(**{key: value, 'id__lt': pk})
+        ).order_by('-' + key, '-id')
+
+    def combine(self, branches, limit):
+        if len(branches) == 1:
+            return branches[0]
+        ordering = branches[0].query.order_by
+        if connections[branches[0].db].features.supports_slicing_ordering_in_compound:
+            # Each branch only needs to contribute one page worth of rows
+            branches = [branch[:limit] for branch in branches]
+        else:
+            branches = [branch.order_by() for branch in branches]
+        return branches[0].union(*branches[1:], all=True).order_by(*ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # --- Cursor encoding ---
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            # A cursor only makes sense for the ordering it was issued for
+            if data['k'] != self.key:
+                raise ValueError
+            value = data['v']
+            if self.key == 'created_at':
+                value = datetime.fromisoformat(value)
+            else:
+                value = float(value)
+            return {'value': value, 'id': int(data['i']), 'reverse': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse=False):
+        value = getattr(instance, self.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data = {'k': self.key, 'v': value, 'i': instance.pk}
+        if reverse:
+            data['r'] = 1
+        token = urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
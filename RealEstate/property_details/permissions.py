@@ -10,4 +10,5 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # Write permissions are only allowed to the owner of the property
-        return obj.owner == request.user
\ No newline at end of file
+        # (compare ids so neither user row has to be loaded)
+        return obj.owner_id == request.user.pk
\ No newline at end of file
@@ -0,0 +1,126 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import MODIFIED_KEY
+
+# Alias the current request's property reads go to; None means the primary
+_read_alias = ContextVar('property_read_alias', default=None)
+
+
+def pin_key(user_id):
+    return f'property:replica-pin:{user_id}'
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def pin_to_primary(user):
+    """Sends the user's reads to the primary until replicas have caught up with their write."""
+    cache.set(pin_key(user.pk), True, pin_seconds())
+
+
+def read_alias(request):
+    """
+    Picks the database for a request's property reads: a random replica
+    from PROPERTY_READ_REPLICAS, or None (the primary) for unsafe methods,
+    for users pinned after a write, and for anonymous requests just after
+    any listing changed, whose responses would otherwise be cached stale.
+    """
+    replicas = getattr(settings, 'PROPERTY_READ_REPLICAS', [])
+    if not replicas or request.method not in SAFE_METHODS:
+        return None
+    return choose_replica(request, replicas, cache.get(freshness_key(request)))
+
+
+async def aread_alias(request):
+    """read_alias() for async views; a network cache is not called from the event loop."""
+    replicas = getattr(settings, 'PROPERTY_READ_REPLICAS', [])
+    if not replicas or request.method not in SAFE_METHODS:
+        return None
+    return choose_replica(request, replicas, await cache.aget(freshness_key(request)))
+
+
+def freshness_key(request):
+    # Users are pinned after their own writes, anonymous reads after any write
+    return pin_key(request.user.pk) if request.user.is_authenticated else MODIFIED_KEY
+
+
+def choose_replica(request, replicas, value):
+    """`value` is the freshness_key() entry: the pin flag or the last-modified time."""
+    if request.user.is_authenticated:
+        if value:
+            return None
+    elif (value or 0) + pin_seconds() > time.time():
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def reading_from(alias):
+    """Routes property reads made inside the block to `alias`."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    Serves safe-method requests from a read replica (see ReplicaRouter).
+    A successful write pins the writer to the primary for
+    REPLICA_PIN_SECONDS so they always read their own edits.
+    Streamed exports are read after the view returns and use the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with reading_from(None):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Authentication has run, so the user's pin can be checked
+        _read_alias.set(read_alias(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            response.status_code < 400 and request.method not in SAFE_METHODS
+            and getattr(settings, 'PROPERTY_READ_REPLICAS', []) and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Sends property_details reads to the replica chosen for the current
+    request, if any. Everything else, including every write, uses the
+    primary. Related objects follow the instance they were loaded from.
+    """
+    route_app_labels = {'property_details'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        # Reads inside a transaction on the primary must see its writes
+        if connections['default'].in_atomic_block:
+            return None
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {'default', *getattr(settings, 'PROPERTY_READ_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
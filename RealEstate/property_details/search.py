@@ -0,0 +1,240 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+# Columns that make up the search document, in weight order.
+# Location columns rank above the free-text description.
+LOCATION_FIELDS = ('address', 'city', 'state')
+SEARCH_FIELDS = LOCATION_FIELDS + ('zip_code', 'description')
+
+PROPERTY_TABLE = 'property_details_property'
+FTS_TABLE = 'property_details_property_fts'
+
+# Keep user input from turning into huge or hostile full-text queries
+MAX_TERMS = 8
+
+
+def parse_terms(value):
+    """
+    Splits a user query into plain word tokens.
+    Operators and punctuation are dropped, so the result is always safe
+    to splice into a tsquery / FTS5 MATCH expression.
+    """
+    return re.findall(r'\w+', (value or '').lower())[:MAX_TERMS]
+
+
+# --- PostgreSQL: weighted tsvector column + GIN index ---
+class PostgresSearchBackend:
+    """
+    A BEFORE INSERT/UPDATE trigger keeps `search_vector` current, so bulk
+    inserts and queryset.update() stay in sync without going through save().
+    """
+    config = 'english'
+
+    def install(self, schema_editor):
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {PROPERTY_TABLE}_search_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('{self.config}', coalesce(NEW.address, '') || ' ' ||
+                        coalesce(NEW.city, '') || ' ' || coalesce(NEW.state, '')), 'A') ||
+                    setweight(to_tsvector('{self.config}', coalesce(NEW.zip_code, '')), 'B') ||
+                    setweight(to_tsvector('{self.config}', coalesce(NEW.description, '')), 'C');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS property_search_update ON {PROPERTY_TABLE};")
+        schema_editor.execute(f"""
+            CREATE TRIGGER property_search_update
+            BEFORE INSERT OR UPDATE ON {PROPERTY_TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {PROPERTY_TABLE}_search_update();
+        """)
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS property_search_vector_gin "
+            f"ON {PROPERTY_TABLE} USING gin (search_vector);"
+        )
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute("DROP INDEX IF EXISTS property_search_vector_gin;")
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS property_search_update ON {PROPERTY_TABLE};")
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {PROPERTY_TABLE}_search_update();")
+
+    def rebuild(self, schema_editor):
+        # Touching a column fires the trigger for every row
+        schema_editor.execute(f"UPDATE {PROPERTY_TABLE} SET address = address;")
+
+    def _query(self, terms, location_only):
+        # Whole words match their stem, the last word matches as a prefix
+        # so results update while the user is still typing.
+        weight = 'A' if location_only else ''
+        tokens = [f"{term}:{weight}" if weight else term for term in terms[:-1]]
+        tokens.append(f"{terms[-1]}:*{weight}")
+        return SearchQuery(' & '.join(tokens), search_type='raw', config=self.config)
+
+    def filter(self, queryset, terms, location_only=False):
+        return queryset.filter(search_vector=self._query(terms, location_only))
+
+    def rank(self, queryset, terms):
+        query = self._query(terms, location_only=False)
+        # ts_rank returns float4; widen it so cursor values round-trip exactly
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+
+# --- SQLite: FTS5 external-content table kept in sync by triggers ---
+class SQLiteSearchBackend:
+    """
+    Mirrors the search columns into an FTS5 index for dev and tests.
+    The index stores only tokens; the text itself stays in the property table.
+    """
+    triggers = ('property_fts_insert', 'property_fts_delete', 'property_fts_update')
+    # bm25 column weights, same order as SEARCH_FIELDS
+    weights = (10.0, 10.0, 10.0, 5.0, 1.0)
+
+    def install(self, schema_editor):
+        columns = ', '.join(SEARCH_FIELDS)
+        new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+        old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+        schema_editor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                {columns},
+                content='{PROPERTY_TABLE}', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+            );
+        """)
+        insert = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete = (
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        schema_editor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS property_fts_insert AFTER INSERT ON {PROPERTY_TABLE}
+            BEGIN {insert} END;
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS property_fts_delete AFTER DELETE ON {PROPERTY_TABLE}
+            BEGIN {delete} END;
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS property_fts_update AFTER UPDATE ON {PROPERTY_TABLE}
+            BEGIN {delete} {insert} END;
+        """)
+
+    def uninstall(self, schema_editor):
+        for trigger in self.triggers:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE};")
+
+    def rebuild(self, schema_editor):
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');")
+
+    def missing_triggers(self, connection):
+        # SQLite drops triggers whenever a migration rebuilds the table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                [PROPERTY_TABLE],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+        return [name for name in self.triggers if name not in existing]
+
+    def _match(self, terms, location_only):
+        tokens = [f'"{term}"' for term in terms]
+        tokens[-1] += '*'
+        expression = ' AND '.join(tokens)
+        if location_only:
+            expression = '{%s} : (%s)' % (' '.join(LOCATION_FIELDS), expression)
+        return expression
+
+    def filter(self, queryset, terms, location_only=False):
+        match = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [self._match(terms, location_only)],
+        )
+        return queryset.filter(id__in=match)
+
+    def rank(self, queryset, terms):
+        expression = self._match(terms, location_only=False)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        # bm25() is "lower is better"; negate it to sort like ts_rank
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {PROPERTY_TABLE}.id",
+            [expression],
+            output_field=FloatField(),
+        )
+        return self.filter(queryset, terms).annotate(search_rank=rank)
+
+
+# --- Fallback for other databases (previous icontains behaviour) ---
+class BasicSearchBackend:
+    def install(self, schema_editor):
+        pass
+
+    def uninstall(self, schema_editor):
+        pass
+
+    def rebuild(self, schema_editor):
+        pass
+
+    def filter(self, queryset, terms, location_only=False):
+        fields = LOCATION_FIELDS if location_only else SEARCH_FIELDS
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def rank(self, queryset, terms):
+        return self.filter(queryset, terms)
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, BasicSearchBackend)()
+
+
+def search_properties(queryset, value, location_only=False):
+    """
+    Filters `queryset` down to properties matching `value`.
+    Unless `location_only` is set, matches are annotated with `search_rank`
+    (higher is better) so the listing can be ordered by relevance.
+    """
+    terms = parse_terms(value)
+    if not terms:
+        return queryset
+    backend = get_backend(connections[queryset.db])
+    if location_only:
+        return backend.filter(queryset, terms, location_only=True)
+    return backend.rank(queryset, terms)
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """
+    post_migrate hook: recreates the SQLite sync triggers if a table
+    rebuild dropped them, then re-syncs the index.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    # Nothing to repair until the search migration has created the index
+    if FTS_TABLE not in connection.introspection.table_names():
+        return
+    backend = SQLiteSearchBackend()
+    if not backend.missing_triggers(connection):
+        return
+    with connection.schema_editor() as schema_editor:
+        backend.install(schema_editor)
+        backend.rebuild(schema_editor)
@@ -1,12 +1,94 @@
+from django.db import transaction
 from rest_framework import serializers
+from backend_core.instrumentation import measure
 from .models import Property, PropertyImage
+from . import dashboard, tasks
 
 class PropertyImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = PropertyImage
-        fields = ('id', 'image_url')
+        fields = ('id', 'image_url', 'width', 'height', 'manifest')
 
-class PropertySerializer(serializers.ModelSerializer):
+class ImageInputField(serializers.Field):
+    """
+    One submitted image: a URL, or {"url", "width", "height"} with the
+    dimensions Cloudinary returned for the upload.
+    Validates to {'url', 'width', 'height'}.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a URL or an object with "url" and optional "width"/"height".',
+        'dimension': '"{name}" must be a positive integer.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = {'url': data}
+        if not isinstance(data, dict) or 'url' not in data:
+            self.fail('invalid')
+        image = {'url': serializers.URLField().run_validation(data['url'])}
+        for name in ('width', 'height'):
+            value = data.get(name)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+                self.fail('dimension', name=name)
+            image[name] = value
+        return image
+
+    def to_representation(self, value):
+        return value
+
+class TimedDataMixin:
+    """Reports the time spent building `.data` as the request's serialize time."""
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+class SparseFieldsetMixin:
+    """
+    Lets read requests trim the representation with ?fields=id,address,price.
+    Unknown names are ignored.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',')} & set(self.fields)
+        if not wanted:
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+class PropertyListSerializer(TimedDataMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact card representation used by the list endpoint.
+    Skips the description and ships a single cover image, which the
+    viewset annotates onto the queryset (Property.objects.with_cover_image()).
+    """
+    cover_image = serializers.ReadOnlyField()
+    # srcset-ready variants of the cover image, stored when it was saved
+    cover_manifest = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Property
+        fields = (
+            'id', 'owner', 'address', 'city', 'state', 'zip_code', 'price',
+            'bedrooms', 'bathrooms', 'size', 'status', 'created_at', 'cover_image',
+            'cover_manifest', 'latitude', 'longitude'
+        )
+        read_only_fields = fields
+        # No relations: the cover image is an annotation
+        select_related = ()
+        prefetch_related = ()
+        list_serializer_class = TimedListSerializer
+
+class PropertySerializer(TimedDataMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     # Read-only field to show the owner's username
     owner_username = serializers.ReadOnlyField(source='owner.username')
     
@@ -14,20 +96,25 @@ class PropertySerializer(serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, read_only=True)
     
     # Write-only field for *receiving* a list of new image URLs
-    # The frontend will get presigned URLs, upload, and send back the final URLs.
+    # The frontend will get presigned URLs, upload, and send back the final URLs
+    # (optionally with their dimensions, see ImageInputField).
     image_urls = serializers.ListField(
-        child=serializers.URLField(), write_only=True, required=False
+        child=ImageInputField(), write_only=True, required=False
     )
 
     class Meta:
         model = Property
         fields = (
             'id', 'owner', 'owner_username', 'address', 'city', 'state', 
-            'zip_code', 'price', 'bedrooms', 'bathrooms', 'size', 
+            'zip_code', 'latitude', 'longitude', 'price', 'bedrooms', 'bathrooms', 'size', 
             'description', 'status', 'created_at', 'updated_at',
             'images', 'image_urls'
         )
         read_only_fields = ('owner',) # Set owner automatically
+        # Relations read during serialization (applied by optimization.py)
+        select_related = ('owner',)
+        prefetch_related = ('images',)
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         # Get image URLs from data, or an empty list
@@ -36,28 +123,85 @@ class PropertySerializer(serializers.ModelSerializer):
         # Set the owner from the authenticated user
         validated_data['owner'] = self.context['request'].user
         
-        # Create the property instance
-        property_instance = Property.objects.create(**validated_data)
-        
-        # Create PropertyImage objects for each URL
-        for url in image_urls:
-            PropertyImage.objects.create(property=property_instance, image_url=url)
-            
+        with transaction.atomic():
+            # Create the property instance
+            property_instance = Property.objects.create(**validated_data)
+
+            # Insert all images in a single query
+            images = PropertyImage.objects.bulk_create([
+                new_image(property_instance, image, position)
+                for position, image in enumerate(unique_images(image_urls))
+            ])
+            # bulk_create sends no model signals
+            dashboard.record_images(property_instance.owner_id, len(images))
+            if images:
+                queue_manifests(property_instance.pk)
+
         return property_instance
 
     def update(self, instance, validated_data):
         # Handle image updates
         image_urls = validated_data.pop('image_urls', None)
         
-        # Update all other fields
-        instance = super().update(instance, validated_data)
-
-        # If image_urls were provided, replace existing images
-        if image_urls is not None:
-            # Delete old images
-            instance.images.all().delete()
-            # Create new ones
-            for url in image_urls:
-                PropertyImage.objects.create(property=instance, image_url=url)
-
-        return instance
\ No newline at end of file
+        with transaction.atomic():
+            # Update all other fields
+            instance = super().update(instance, validated_data)
+
+            # If image_urls were provided, sync the stored images to match them
+            if image_urls is not None:
+                self.sync_images(instance, unique_images(image_urls))
+
+        return instance
+
+    def sync_images(self, instance, images):
+        """
+        Diffs the submitted URLs against the stored images: only removed
+        URLs are deleted and only new ones inserted. Kept images are just
+        renumbered when the client reordered them.
+        """
+        # Reuses the viewset's prefetched images when they are loaded
+        existing = {image.image_url: image for image in instance.images.all()}
+        wanted = {image['url'] for image in images}
+
+        removed = [image.pk for url, image in existing.items() if url not in wanted]
+        if removed:
+            PropertyImage.objects.filter(pk__in=removed).delete()
+
+        added, moved = [], []
+        for position, submitted in enumerate(images):
+            image = existing.get(submitted['url'])
+            if image is None:
+                added.append(new_image(instance, submitted, position))
+            elif image.position != position:
+                image.position = position
+                moved.append(image)
+        if added:
+            PropertyImage.objects.bulk_create(added)
+            dashboard.record_images(instance.owner_id, len(added))
+            queue_manifests(instance.pk)
+        if moved:
+            PropertyImage.objects.bulk_update(moved, ['position'])
+
+
+def unique_images(images):
+    # The same photo submitted twice is stored once, at its first position
+    unique = {}
+    for image in images:
+        unique.setdefault(image['url'], image)
+    return list(unique.values())
+
+
+def new_image(property_instance, image, position):
+    """
+    An unsaved PropertyImage for a validated ImageInputField value. Its
+    manifest is left to the build_image_manifests task.
+    """
+    return PropertyImage(
+        property=property_instance, image_url=image['url'], position=position,
+        width=image.get('width'), height=image.get('height'),
+    )
+
+
+def queue_manifests(property_id):
+    # One waiting job per listing covers any number of image edits
+    tasks.build_image_manifests.enqueue([property_id], key=f'image-manifests:{property_id}')
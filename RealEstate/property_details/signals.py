@@ -0,0 +1,97 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import changes, dashboard, events, facets, market
+from .cache import bump_generation
+from .models import Property, PropertyChange, PropertyImage
+
+
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=PropertyImage)
+def invalidate_property_cache(sender, **kwargs):
+    # Any listing write makes every cached listing response stale
+    bump_generation()
+
+
+# --- Aggregates, price history and live events (facets.py, dashboard.py, market.py, events.py) ---
+def tracked_values(instance):
+    deferred = instance.get_deferred_fields() & set(Property.TRACKED_FIELDS)
+    if deferred:
+        # One query for every deferred field rather than one each
+        instance.refresh_from_db(fields=deferred)
+    return {field: getattr(instance, field) for field in Property.TRACKED_FIELDS}
+
+
+def publish_event(old_values, new_values, pk):
+    # Pushed to live subscribers once the write is committed (see events.py)
+    event = events.property_event(old_values, new_values, pk)
+    if event is not None:
+        transaction.on_commit(partial(events.publish, event))
+
+
+@receiver(pre_save, sender=Property)
+def load_tracked_values(sender, instance, **kwargs):
+    # Instances not loaded with every tracked field (new, or via only())
+    # need their stored values fetched before they are overwritten
+    if instance._state.adding or hasattr(instance, '_tracked_values'):
+        return
+    instance._tracked_values = (
+        Property.objects.filter(pk=instance.pk).values(*Property.TRACKED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Property)
+def update_aggregates_on_save(sender, instance, created, **kwargs):
+    old_values = None if created else getattr(instance, '_tracked_values', None)
+    new_values = tracked_values(instance)
+    facets.record_change(old_values, new_values)
+    dashboard.record_change(old_values, new_values)
+    market.record_change(old_values, new_values, instance.pk)
+    publish_event(old_values, new_values, instance.pk)
+    instance._tracked_values = new_values
+
+
+@receiver(pre_delete, sender=Property)
+def snapshot_aggregates_on_delete(sender, instance, **kwargs):
+    # Read the values while the row still exists
+    instance._tracked_values = tracked_values(instance)
+
+
+@receiver(post_delete, sender=Property)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    facets.record_change(instance._tracked_values, None)
+    dashboard.record_change(instance._tracked_values, None)
+    market.record_change(instance._tracked_values, None, instance.pk)
+    publish_event(instance._tracked_values, None, instance.pk)
+
+
+@receiver(post_save, sender=PropertyImage)
+def count_image_on_save(sender, instance, created, **kwargs):
+    if created:
+        dashboard.record_image(instance.property_id, 1)
+
+
+@receiver(post_delete, sender=PropertyImage)
+def count_image_on_delete(sender, instance, **kwargs):
+    # Cascades delete images before their property, so its owner is still there
+    dashboard.record_image(instance.property_id, -1)
+
+
+# --- Change log (changes.py) ---
+@receiver(post_save, sender=Property)
+def log_property_save(sender, instance, **kwargs):
+    changes.record([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def log_property_delete(sender, instance, **kwargs):
+    changes.record([instance.pk], PropertyChange.Kind.DELETE)
+
+
+@receiver([post_save, post_delete], sender=PropertyImage)
+def log_image_write(sender, instance, **kwargs):
+    # The property's representation includes its images
+    changes.record([instance.property_id])
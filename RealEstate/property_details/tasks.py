@@ -0,0 +1,33 @@
+from jobs.queue import task
+
+from . import changes, market
+from .cache import bump_generation
+from .models import PropertyImage
+
+
+@task
+def build_image_manifests(property_ids):
+    """
+    Stores the responsive variant manifests (images.py) of the listings'
+    images. Queued by the API and bulk import image writes, which insert
+    the rows and leave the derived variants to a worker. Only rows whose
+    manifest changed are written, so running it again is harmless.
+    """
+    changed = []
+    for image in PropertyImage.objects.filter(property_id__in=property_ids):
+        manifest = image.manifest
+        image.update_manifest()
+        if image.manifest != manifest:
+            changed.append(image)
+    if not changed:
+        return
+    # bulk_update sends no model signals
+    PropertyImage.objects.bulk_update(changed, ['manifest'], batch_size=500)
+    changes.record({image.property_id for image in changed})
+    bump_generation()
+
+
+@task
+def refresh_market_stats():
+    """Rolls history recorded since the last run into MarketStats (see market.refresh)."""
+    market.refresh()
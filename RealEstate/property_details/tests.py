@@ -1,3 +1,1513 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from User_details.models import CustomUser
+from backend_core.throttling import SlidingWindowThrottle
+from jobs import queue
+from jobs.models import Job
+from . import bulk, changes, dashboard, events, facets, images, market, uploads
+from .cache import MODIFIED_KEY
+from .models import (
+    MarketStats, OwnerSummary, Property, PropertyChange, PropertyFacet, PropertyHistory, PropertyImage,
+)
+from .replicas import ReplicaRouter, read_alias, reading_from
+
+
+def make_property(owner, **kwargs):
+    data = {
+        'address': '1 Main Street', 'city': 'Springfield', 'state': 'IL',
+        'zip_code': '62701', 'price': 250000, 'bedrooms': 3, 'bathrooms': 2,
+        'size': 1500,
+    }
+    data.update(kwargs)
+    return Property.objects.create(owner=owner, **data)
+
+
+class QueryBudgetMixin:
+    """
+    assertQueriesIndependentOfPageSize() fails a list endpoint whose query
+    count grows with the number of rows serialized (an N+1 lookup).
+    Needs at least max(page_sizes) visible rows.
+    """
+    page_sizes = (1, 10)
+
+    def count_queries(self, url, params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), params['page_size'])
+        return len(ctx.captured_queries)
+
+    def assertQueriesIndependentOfPageSize(self, url, params=None):
+        counts = {
+            size: self.count_queries(url, {**(params or {}), 'page_size': size})
+            for size in self.page_sizes
+        }
+        self.assertEqual(len(set(counts.values())), 1, f'Query count grows with page size: {counts}')
+
+
+class AuthenticatedListingTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        statuses = [Property.PropertyStatus.ACTIVE, Property.PropertyStatus.PENDING, Property.PropertyStatus.SOLD]
+        for i in range(12):
+            prop = make_property(
+                cls.alice if i % 2 else cls.bob,
+                address=f'{i} Main Street', status=statuses[i % 3],
+            )
+            PropertyImage.objects.create(property=prop, image_url=f'https://example.com/{i}.jpg')
+
+    def setUp(self):
+        self.client.force_authenticate(self.alice)
+
+    def property_queries(self, captured):
+        return [q['sql'] for q in captured if 'FROM "property_details_property"' in q['sql']]
+
+    def test_lists_active_and_own_listings(self):
+        response = self.client.get(self.url, {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.data['results']]
+        expected = Property.objects.filter(status=Property.PropertyStatus.ACTIVE) | \
+            Property.objects.filter(owner=self.alice)
+        self.assertEqual(ids, list(expected.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_pages_do_not_overlap(self):
+        seen = []
+        url = self.url + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 8)
+
+    def test_single_union_query_without_distinct(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'page_size': 5, 'city': 'Springfield'})
+        queries = self.property_queries(ctx.captured_queries)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('UNION ALL', queries[0])
+        self.assertNotIn('DISTINCT', queries[0])
+
+    def test_explain_uses_one_index_per_branch(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'page_size': 5})
+        sql = self.property_queries(ctx.captured_queries)[0]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('UNION ALL', plan)
+        self.assertIn('property_status_created_idx', plan)
+        self.assertIn('property_owner_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_other_users_inactive_listing_is_hidden(self):
+        hidden = Property.objects.filter(owner=self.bob).exclude(status=Property.PropertyStatus.ACTIVE).first()
+        response = self.client.get(f'{self.url}{hidden.pk}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class PaginationTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        # bulk_create skips the signals; only the listing is read here
+        Property.objects.bulk_create([
+            Property(
+                owner=cls.alice, address=f'{i} Main Street', city='Springfield', state='IL',
+                zip_code='62701', price=1000 + i, bedrooms=1, bathrooms=1, size=100,
+                description='Main street, main square, by main park.'[:10 + i % 30],
+            )
+            for i in range(105)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, params):
+        pages, url = [], self.url
+        while url:
+            data = self.get(url, params if url == self.url else None)
+            pages.append(data)
+            url = data['next']
+        return pages
+
+    def ids(self, data):
+        return [row['id'] for row in data['results']]
+
+    def test_previous_links_walk_back(self):
+        pages = self.walk({'page_size': 40})
+        self.assertEqual([len(page['results']) for page in pages], [40, 40, 25])
+        expected = list(Property.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], expected)
+        self.assertIsNone(pages[0]['previous'])
+        # Reverse cursors return the same pages, in the same order
+        back = self.get(pages[2]['previous'])
+        self.assertEqual(self.ids(back), self.ids(pages[1]))
+        first = self.get(back['previous'])
+        self.assertEqual(self.ids(first), self.ids(pages[0]))
+        self.assertIsNone(first['previous'])
+        self.assertEqual(first['next'], pages[0]['next'])
+
+    def test_bad_cursors_are_not_found(self):
+        next_url = self.get(self.url, {'page_size': 5})['next']
+        cursor = parse_qs(urlparse(next_url).query)['cursor'][0]
+        data = json.loads(base64.urlsafe_b64decode(cursor))
+        tampered = [
+            'not-a-cursor',
+            base64.urlsafe_b64encode(b'[1, 2]').decode(),
+            base64.urlsafe_b64encode(json.dumps({**data, 'i': 'x'}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({**data, 'v': 'yesterday'}).encode()).decode(),
+            # A created_at cursor can't page a ranked search
+            base64.urlsafe_b64encode(json.dumps({**data, 'k': 'search_rank'}).encode()).decode(),
+        ]
+        for value in tampered:
+            self.assertEqual(self.client.get(self.url, {'cursor': value}).status_code, 404, value)
+        self.assertEqual(self.client.get(self.url, {'cursor': cursor, 'q': 'main'}).status_code, 404)
+
+    def test_page_size_is_capped(self):
+        self.assertEqual(len(self.get(self.url, {'page_size': 1000})['results']), 100)
+        for size in ('0', '-3', 'all'):
+            self.assertEqual(len(self.get(self.url, {'page_size': size})['results']), 20)
+
+    def test_cursors_follow_search_rank(self):
+        expected = self.ids(self.get(self.url, {'q': 'main', 'page_size': 100}))
+        pages = self.walk({'q': 'main', 'page_size': 7})
+        self.assertEqual([pk for page in pages for pk in self.ids(page)][:100], expected)
+        self.assertEqual(len({pk for page in pages for pk in self.ids(page)}), 105)
+        # Ranks differ with the description length, so the order is not just by date
+        self.assertNotEqual(expected, sorted(expected, reverse=True))
+        back = self.get(pages[3]['previous'])
+        self.assertEqual(self.ids(back), self.ids(pages[2]))
+
+
+class AnonymousCacheTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.prop = make_property(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.client.get(self.url, {'city': 'Springfield'})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'city': 'Springfield', 'state': ''})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_write_invalidates_cached_listing(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_property(self.owner, address='2 Main Street')
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_etag_revalidation_returns_304(self):
+        response = self.client.get(f'{self.url}{self.prop.pk}/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(f'{self.url}{self.prop.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PropertyImage.objects.create(property=self.prop, image_url='https://example.com/new.jpg')
+        response = self.client.get(f'{self.url}{self.prop.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['images']), 1)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class PropertyImageWriteTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def payload(self, image_count):
+        return {
+            'address': '1 Main Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '250000.00', 'bedrooms': 3,
+            'bathrooms': '2.0', 'size': 1500,
+            'image_urls': [f'https://example.com/{i}.jpg' for i in range(image_count)],
+        }
+
+    def test_create_inserts_images_in_one_query(self):
+        make_property(self.owner)  # so the facet row already exists
+        # savepoint, property insert, facet count update, owner summary
+        # update, history insert, market stats job insert, change-log
+        # insert, bulk image insert, owner image count update, manifest job
+        # insert, release, images for the response
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url, self.payload(30), format='json')
+        self.assertEqual(response.status_code, 201)
+        urls = [image['image_url'] for image in response.data['images']]
+        self.assertEqual(urls, self.payload(30)['image_urls'])
+
+    def test_update_only_touches_changed_images(self):
+        response = self.client.post(self.url, self.payload(10), format='json')
+        pk = response.data['id']
+        before = {image['image_url']: image['id'] for image in response.data['images']}
+
+        urls = self.payload(10)['image_urls']
+        urls.remove('https://example.com/3.jpg')
+        urls.insert(0, 'https://example.com/new.jpg')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(f'{self.url}{pk}/', {'image_urls': urls}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        image_sql = [q['sql'] for q in ctx.captured_queries if 'property_details_propertyimage' in q['sql']]
+        self.assertEqual(sum(sql.startswith('INSERT') for sql in image_sql), 1)
+        self.assertEqual(sum(sql.startswith('DELETE') for sql in image_sql), 1)
+        self.assertEqual(sum(sql.startswith('UPDATE') for sql in image_sql), 1)
+
+        after = response.data['images']
+        self.assertEqual([image['image_url'] for image in after], urls)
+        # Kept images keep their rows
+        for image in after[1:]:
+            self.assertEqual(image['id'], before[image['image_url']])
+
+    def test_update_without_image_changes_leaves_images_alone(self):
+        response = self.client.post(self.url, self.payload(3), format='json')
+        pk = response.data['id']
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(f'{self.url}{pk}/', {'price': '1.00', 'image_urls': self.payload(3)['image_urls']}, format='json')
+        writes = [q['sql'] for q in ctx.captured_queries
+                  if 'property_details_propertyimage' in q['sql'] and not q['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+
+class ListRepresentationTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.prop = make_property(cls.owner, description='A long description')
+        PropertyImage.objects.bulk_create([
+            PropertyImage(property=cls.prop, image_url=f'https://example.com/{i}.jpg', position=2 - i)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_ships_cover_image_only(self):
+        item = self.client.get(self.url).data['results'][0]
+        self.assertEqual(item['cover_image'], 'https://example.com/2.jpg')
+        self.assertNotIn('images', item)
+        self.assertNotIn('description', item)
+
+    def test_sparse_fieldset(self):
+        item = self.client.get(self.url, {'fields': 'id,price'}).data['results'][0]
+        self.assertEqual(set(item), {'id', 'price'})
+        detail = self.client.get(f'{self.url}{self.prop.pk}/', {'fields': 'id,images'}).data
+        self.assertEqual(set(detail), {'id', 'images'})
+        self.assertEqual(len(detail['images']), 3)
+
+
+class ImageManifestTests(APITestCase):
+    url = '/api/v1/properties/'
+    upload = 'https://res.cloudinary.com/demo/image/upload/v1712/properties/7-abc.jpg'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+
+    def setUp(self):
+        cache.clear()
+
+    def payload(self, image_urls):
+        return {
+            'address': '1 Main Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '250000.00', 'bedrooms': 3,
+            'bathrooms': '2.0', 'size': 1500, 'image_urls': image_urls,
+        }
+
+    def test_manifest_variants(self):
+        manifest = images.build_manifest(self.upload, 1000, 750)
+        base = 'https://res.cloudinary.com/demo/image/upload/'
+        self.assertEqual(manifest['variants']['card'], {
+            'width': 480,
+            'avif': f'{base}c_limit,w_480/f_avif,q_auto/v1712/properties/7-abc.jpg',
+            'webp': f'{base}c_limit,w_480/f_webp,q_auto/v1712/properties/7-abc.jpg',
+        })
+        # Never upscaled: 'full' is capped at the original's width
+        self.assertEqual(manifest['variants']['full']['width'], 1000)
+        self.assertEqual([source['type'] for source in manifest['sources']], ['image/avif', 'image/webp'])
+        self.assertTrue(manifest['sources'][1]['srcset'].endswith(' 1000w'))
+        self.assertIn('e_blur', manifest['placeholder'])
+
+    def test_stored_transformation_is_replaced(self):
+        manifest = images.build_manifest('https://res.cloudinary.com/demo/image/upload/c_fill,w_50/sample.jpg')
+        self.assertEqual(
+            manifest['variants']['thumb']['webp'],
+            'https://res.cloudinary.com/demo/image/upload/c_limit,w_160/f_webp,q_auto/sample.jpg',
+        )
+
+    def test_other_hosts_have_no_manifest(self):
+        self.assertIsNone(images.build_manifest('https://example.com/1.jpg'))
+
+    def test_create_accepts_dimensions_and_stores_manifest(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(self.url, self.payload([
+            {'url': self.upload, 'width': 4032, 'height': 3024}, 'https://example.com/2.jpg',
+        ]), format='json')
+        self.assertEqual(response.status_code, 201)
+        cover, other = response.data['images']
+        self.assertEqual((cover['width'], cover['height']), (4032, 3024))
+        # Built by a background job after the response
+        self.assertIsNone(cover['manifest'])
+        self.assertEqual(queue.run_pending(), 1)
+
+        cover, other = self.client.get(f"{self.url}{response.data['id']}/").data['images']
+        self.assertEqual(cover['manifest'], images.build_manifest(self.upload, 4032, 3024))
+        self.assertIsNone(other['manifest'])
+        item = self.client.get(self.url).data['results'][0]
+        self.assertEqual(item['cover_manifest'], cover['manifest'])
+
+    def test_image_edits_share_one_waiting_job(self):
+        self.client.force_authenticate(self.owner)
+        pk = self.client.post(self.url, self.payload([self.upload]), format='json').data['id']
+        other = 'https://res.cloudinary.com/demo/image/upload/v1712/properties/8-def.jpg'
+        self.client.patch(f'{self.url}{pk}/', {'image_urls': [self.upload, other]}, format='json')
+        self.assertEqual(Job.objects.filter(idempotency_key=f'image-manifests:{pk}').count(), 1)
+        last_change = PropertyChange.objects.latest('pk').pk
+        queue.run_pending()
+        stored = PropertyImage.objects.filter(property_id=pk).values_list('image_url', 'manifest')
+        self.assertEqual(dict(stored), {url: images.build_manifest(url) for url in (self.upload, other)})
+        # The listing shows up as changed for syncing clients
+        self.assertTrue(PropertyChange.objects.filter(pk__gt=last_change, property_id=pk).exists())
+
+    def test_invalid_image_input(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(self.url, self.payload([{'width': 10}]), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image_urls', response.data)
+
+    def test_changing_url_updates_manifest(self):
+        prop = make_property(self.owner)
+        image = PropertyImage.objects.create(property=prop, image_url='https://example.com/1.jpg')
+        image.image_url = self.upload
+        image.save(update_fields=['image_url'])
+        image.refresh_from_db()
+        self.assertEqual(image.manifest, images.build_manifest(self.upload))
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = [
+            CustomUser.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='pw')
+            for i in range(3)
+        ]
+        for i in range(12):
+            prop = make_property(cls.owners[i % 3], address=f'{i} Main Street')
+            PropertyImage.objects.create(property=prop, image_url=f'https://example.com/{i}.jpg')
+
+    def test_anonymous_list(self):
+        self.assertQueriesIndependentOfPageSize(self.url)
+
+    def test_authenticated_list(self):
+        self.client.force_authenticate(self.owners[0])
+        self.assertQueriesIndependentOfPageSize(self.url)
+
+    def test_search_list(self):
+        self.assertQueriesIndependentOfPageSize(self.url, {'q': 'main'})
+
+    def test_filtered_list(self):
+        self.assertQueriesIndependentOfPageSize(
+            self.url, {'city': 'Springfield', 'min_price': 1000, 'max_price': 900000, 'bedrooms': 2},
+        )
+
+    def test_list_budgets(self):
+        # One keyset query per page, the cover image being a subquery
+        cases = [
+            (None, {}), (None, {'city': 'Springfield', 'bedrooms': 2}), (None, {'q': 'main'}),
+            (self.owners[0], {}),
+        ]
+        for user, params in cases:
+            with self.subTest(user=user, params=params):
+                cache.clear()
+                self.client.force_authenticate(user)
+                with self.assertNumQueries(1):
+                    response = self.client.get(self.url, {**params, 'page_size': 5})
+                self.assertEqual(response.status_code, 200)
+
+    def test_detail_joins_owner(self):
+        prop = Property.objects.first()
+        # property + owner in one join, images prefetch
+        with self.assertNumQueries(2):
+            response = self.client.get(f'{self.url}{prop.pk}/')
+        self.assertEqual(response.data['owner_username'], prop.owner.username)
+
+    def test_create_with_images(self):
+        self.client.force_authenticate(self.owners[0])
+        for count in (1, 5):
+            payload = {
+                'address': '1 Main Street', 'city': 'Springfield', 'state': 'IL',
+                'zip_code': '62701', 'price': '250000.00', 'bedrooms': 3,
+                'bathrooms': '2.0', 'size': 1500,
+                'image_urls': [f'https://example.com/new/{i}.jpg' for i in range(count)],
+            }
+            with self.subTest(images=count), self.assertNumQueries(12):
+                response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(len(response.data['images']), count)
+
+
+class AsyncReadPathTests(APITestCase):
+    sync_url = '/api/v1/properties/'
+    async_url = '/api/v1/async/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        for i in range(5):
+            prop = make_property(cls.alice, address=f'{i} Main Street')
+            PropertyImage.objects.create(property=prop, image_url=f'https://example.com/{i}.jpg')
+        cls.sold = make_property(cls.alice, status=Property.PropertyStatus.SOLD)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_matches_sync_viewset(self):
+        for params in ({'page_size': 2}, {'city': 'Springfield', 'page_size': 10}):
+            expected = self.client.get(self.sync_url, params).data
+            response = self.client.get(self.async_url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], json.loads(json.dumps(expected['results'])))
+        next_page = self.client.get(self.async_url, {'page_size': 2}).json()['next']
+        self.assertIn('/api/v1/async/properties/?', next_page)
+
+    def test_detail_respects_visibility(self):
+        self.assertEqual(self.client.get(f'{self.async_url}{self.sold.pk}/').status_code, 404)
+        self.client.force_authenticate(self.alice)
+        response = self.client.get(f'{self.async_url}{self.sold.pk}/')
+        self.assertEqual(response.json()['owner_username'], 'alice')
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get(f'{self.async_url}{self.sold.pk}/').status_code, 404)
+
+    def test_anonymous_responses_are_cached(self):
+        etag = self.client.get(self.async_url).headers['ETag']
+        response = self.client.get(self.async_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_filter_and_token(self):
+        self.assertEqual(self.client.get(self.async_url, {'bbox': '1'}).status_code, 400)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        response = self.client.get(self.async_url)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response.headers)
+
+    def test_signature_requires_authentication(self):
+        self.assertEqual(self.client.post('/api/v1/async/generate-upload-signature/').status_code, 401)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'async_cache'}},
+        CLOUDINARY_STORAGE={'CLOUD_NAME': 'demo', 'API_KEY': 'key', 'API_SECRET': 'secret'},
+        PROPERTY_READ_REPLICAS=['default'],
+    )
+    def test_cache_is_not_called_from_the_event_loop(self):
+        # The database cache refuses sync calls on the event loop, like a
+        # network cache should never get them
+        call_command('createcachetable', verbosity=0)
+        uploads.get_credentials.cache_clear()
+        self.addCleanup(uploads.get_credentials.cache_clear)
+        response = self.client.get(self.async_url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.async_url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(f'{self.async_url}{self.sold.pk}/').status_code, 200)
+        response = self.client.post('/api/v1/async/generate-upload-signature/')
+        self.assertEqual(response.status_code, 200)
+
+
+class SearchTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.lakeside = make_property(cls.alice, address='12 Lakeside Drive', description='Quiet street.')
+        cls.lake_view = make_property(cls.alice, address='4 Elm Street', description='Lake views from the porch.')
+        cls.orchard = make_property(
+            cls.alice, address='9 Orchard Lane', city='Shelbyville', description='Walk to the lake.',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_ranking_order(self):
+        make_property(self.alice, address='1 Garden Row', description='Garden, garden and more garden.')
+        in_address = make_property(self.alice, address='2 Garden Row', city='Gardenville')
+        in_description = make_property(self.alice, address='3 Oak Row', description='Small garden.')
+        ids = self.ids(q='garden')
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[-1], in_description.pk)
+        self.assertLess(ids.index(in_address.pk), ids.index(in_description.pk))
+        # A location match outranks the same word in a description
+        self.assertEqual(self.ids(q='lake')[0], self.lakeside.pk)
+
+    def test_only_the_last_term_is_a_prefix(self):
+        self.assertEqual(self.ids(q='orch'), [self.orchard.pk])
+        self.assertEqual(self.ids(q='orchard la'), [self.orchard.pk])
+        self.assertEqual(self.ids(q='orch lane'), [])
+
+    def test_location_ignores_description(self):
+        self.assertEqual(self.ids(location='lake'), [self.lakeside.pk])
+        self.assertEqual(set(self.ids(location='il')), {self.lakeside.pk, self.lake_view.pk, self.orchard.pk})
+        self.assertEqual(self.ids(location='porch'), [])
+        self.assertEqual(self.ids(q='porch'), [self.lake_view.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.orchard.description = 'Close to the river.'
+        self.orchard.save()
+        self.assertEqual(self.ids(q='river'), [self.orchard.pk])
+        self.assertNotIn(self.orchard.pk, self.ids(q='lake'))
+        # queryset.update() skips save() but not the database triggers
+        Property.objects.filter(pk=self.lake_view.pk).update(address='4 Birch Street')
+        self.assertEqual(self.ids(q='birch'), [self.lake_view.pk])
+        self.assertEqual(self.ids(q='elm'), [])
+        self.lakeside.delete()
+        self.assertEqual(self.ids(q='lakeside'), [])
+
+
+class BulkTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.alice)
+
+    def row(self, i, **kwargs):
+        return {
+            'address': f'{i} Import Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '1000.00', 'bedrooms': 1, 'bathrooms': '1.0', 'size': 400,
+            **kwargs,
+        }
+
+    def post(self, body, content_type='application/x-ndjson'):
+        return self.client.post(f'{self.url}import/', body, content_type=content_type)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        body = '\n'.join([
+            json.dumps(self.row(1)),
+            json.dumps(self.row(2, price='cheap')),
+            '{not json',
+            '',
+            '[1, 2]',
+            json.dumps(self.row(3)),
+        ])
+        response = self.post(body)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 3))
+        # Blank lines are skipped without taking a row number
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('price', response.data['errors'][0]['errors'])
+        self.assertEqual(Property.objects.filter(owner=self.alice).count(), 2)
+        response = self.post(json.dumps(self.row(4, state='')))
+        self.assertEqual((response.status_code, response.data['created']), (400, 0))
+
+    def test_csv_import(self):
+        body = (
+            'address,city,state,zip_code,price,bedrooms,bathrooms,size,description,image_urls\n'
+            '1 Csv Street,Springfield,IL,62701,1000.00,2,1.5,500,,https://example.com/a.jpg https://example.com/b.jpg\n'
+            '"2 Csv Street, Unit 4",Springfield,IL,62701,2000.00,3,2.0,700,"Has a ""view""",\n'
+        )
+        response = self.post(body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 2)
+        first = Property.objects.get(address='1 Csv Street')
+        self.assertEqual(
+            list(first.images.order_by('position').values_list('image_url', flat=True)),
+            ['https://example.com/a.jpg', 'https://example.com/b.jpg'],
+        )
+        second = Property.objects.get(address='2 Csv Street, Unit 4')
+        self.assertEqual(second.description, 'Has a "view"')
+        self.assertFalse(second.images.exists())
+
+    def test_rows_are_written_in_chunks(self):
+        body = '\n'.join(json.dumps(self.row(i)) for i in range(5))
+        with mock.patch.object(bulk, 'CHUNK_SIZE', 2), \
+                mock.patch.object(bulk, 'write_chunk', wraps=bulk.write_chunk) as write_chunk:
+            response = self.post(body)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual([len(call.args[0]) for call in write_chunk.call_args_list], [2, 2, 1])
+
+    def test_failed_chunk_rolls_back_alone(self):
+        body = '\n'.join(json.dumps(self.row(i)) for i in range(5))
+        with mock.patch.object(bulk, 'CHUNK_SIZE', 2), \
+                mock.patch.object(bulk.market, 'record_created', side_effect=[None, RuntimeError, None]):
+            with self.assertRaises(RuntimeError):
+                self.post(body)
+        # The first chunk was committed before the second one failed
+        self.assertEqual(Property.objects.filter(owner=self.alice).count(), 2)
+
+    def test_export_streams_every_match(self):
+        self.post('\n'.join([
+            json.dumps(self.row(1, image_urls=['https://example.com/1.jpg', 'https://example.com/2.jpg'])),
+            json.dumps(self.row(2, city='Shelbyville', description='Line one\nline, two')),
+        ]))
+        response = self.client.get(f'{self.url}export/', {'city': 'Springfield'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(list(row), list(bulk.EXPORT_FIELDS))
+        self.assertEqual((row['address'], row['price']), ('1 Import Street', '1000.00'))
+        self.assertEqual(row['image_urls'], ['https://example.com/1.jpg', 'https://example.com/2.jpg'])
+
+        response = self.client.get(f'{self.url}export/', {'format': 'csv'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        by_address = {row['address']: row for row in rows}
+        self.assertEqual(by_address['1 Import Street']['image_urls'], 'https://example.com/1.jpg https://example.com/2.jpg')
+        self.assertEqual(by_address['2 Import Street']['description'], 'Line one\nline, two')
+        # The exported CSV imports back as the same listings
+        response = self.post(content, content_type='text/csv')
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 0))
+
+
+class GeoSearchTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.capitol = make_property(cls.alice, latitude=39.7983, longitude=-89.6544)
+        # About 3 km and 30 km east of it
+        cls.near = make_property(cls.alice, latitude=39.7983, longitude=-89.6194)
+        cls.far = make_property(cls.alice, latitude=39.7983, longitude=-89.3044)
+        # Either side of the antimeridian, about 7 km apart
+        cls.fiji = make_property(cls.alice, latitude=0.0, longitude=179.95)
+        cls.samoa = make_property(cls.alice, latitude=0.0, longitude=-179.99)
+        cls.unplaced = make_property(cls.alice)
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_bbox(self):
+        self.assertEqual(self.ids(bbox='-89.7,39.7,-89.6,39.9'), {self.capitol.pk, self.near.pk})
+        self.assertEqual(self.ids(bbox='-90,39,-89,40', city='Springfield'), {self.capitol.pk, self.near.pk, self.far.pk})
+        # West > east crosses the antimeridian
+        self.assertEqual(self.ids(bbox='179.9,-1,-179.9,1'), {self.fiji.pk, self.samoa.pk})
+        for bbox in ('1,2,3', '0,50,1,40', '-190,0,0,1', 'a,b,c,d'):
+            self.assertEqual(self.client.get(self.url, {'bbox': bbox}).status_code, 400, bbox)
+
+    def test_near_and_radius(self):
+        self.assertEqual(self.ids(near='39.7983,-89.6544', radius=5), {self.capitol.pk, self.near.pk})
+        # The default radius is 10 km
+        self.assertEqual(self.ids(near='39.7983,-89.6544'), {self.capitol.pk, self.near.pk})
+        self.assertEqual(self.ids(near='39.7983,-89.6544', radius=50), {self.capitol.pk, self.near.pk, self.far.pk})
+        # Inside the bounding box but outside the circle
+        self.assertEqual(self.ids(near='39.8183,-89.6294', radius=2.5), {self.near.pk})
+        for near in ('39.8', '91,0', '0,181', 'x,y'):
+            self.assertEqual(self.client.get(self.url, {'near': near}).status_code, 400, near)
+
+    def test_near_across_antimeridian(self):
+        self.assertEqual(self.ids(near='0,-179.99', radius=20), {self.fiji.pk, self.samoa.pk})
+        self.assertEqual(self.ids(near='0,179.95', radius=20), {self.fiji.pk, self.samoa.pk})
+        self.assertEqual(self.ids(near='0,179.95', radius=5), {self.fiji.pk})
+
+    def test_clusters(self):
+        url = f'{self.url}clusters/'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(url, {'bbox': '-90,39,-89,40', 'precision': 4})
+        self.assertEqual(response.data['precision'], 4)
+        self.assertEqual(
+            [(cluster['cell'], cluster['count']) for cluster in response.data['clusters']],
+            [('dp04', 1), ('dp06', 2)],
+        )
+        # Listings without coordinates are never clustered
+        response = self.client.get(url, {'bbox': '-180,-90,180,90', 'precision': 1})
+        self.assertEqual(sum(cluster['count'] for cluster in response.data['clusters']), 5)
+        # Other filters apply, and the precision follows the zoom level
+        response = self.client.get(url, {'bbox': '179.9,-1,-179.9,1', 'bedrooms': 9})
+        self.assertEqual(response.data['clusters'], [])
+        self.assertGreater(response.data['precision'], 4)
+
+
+class ReplicaRoutingTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        cls.prop = make_property(cls.alice)
+
+    def setUp(self):
+        cache.clear()
+        # No listing has changed recently
+        cache.set(MODIFIED_KEY, 0, None)
+
+    def make_request(self, method='get', user=None):
+        request = getattr(RequestFactory(), method)(self.url)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_safe_reads_use_a_replica(self):
+        with override_settings(PROPERTY_READ_REPLICAS=[]):
+            self.assertIsNone(read_alias(self.make_request()))
+        with override_settings(PROPERTY_READ_REPLICAS=['replica_0']):
+            self.assertEqual(read_alias(self.make_request()), 'replica_0')
+            self.assertEqual(read_alias(self.make_request(user=self.alice)), 'replica_0')
+            self.assertIsNone(read_alias(self.make_request('post', user=self.alice)))
+
+    def test_transactions_read_the_primary(self):
+        # Every TestCase runs inside a transaction on the primary
+        with reading_from('replica_0'):
+            self.assertIsNone(ReplicaRouter().db_for_read(Property))
+
+    @override_settings(PROPERTY_READ_REPLICAS=['replica_0'])
+    def test_writer_is_pinned_to_primary(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.patch(f'{self.url}{self.prop.pk}/', {'price': 260000}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(read_alias(self.make_request(user=self.alice)))
+        self.assertEqual(read_alias(self.make_request(user=self.bob)), 'replica_0')
+
+    @override_settings(PROPERTY_READ_REPLICAS=['replica_0'])
+    def test_recent_change_keeps_anonymous_reads_on_primary(self):
+        # Anonymous responses are cached, so they must not be built from a lagging replica
+        cache.set(MODIFIED_KEY, int(time.time()), None)
+        self.assertIsNone(read_alias(self.make_request()))
+        self.assertEqual(read_alias(self.make_request(user=self.bob)), 'replica_0')
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_only_property_reads_are_routed(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Property))
+        with reading_from('replica_0'):
+            self.assertEqual(router.db_for_read(Property), 'replica_0')
+            self.assertEqual(router.db_for_read(PropertyImage), 'replica_0')
+            self.assertIsNone(router.db_for_read(CustomUser))
+            self.assertEqual(router.db_for_write(Property), 'default')
+
+
+@skipUnless(
+    [alias for alias in settings.PROPERTY_READ_REPLICAS if not settings.DATABASES[alias]['TEST'].get('MIRROR')],
+    'set DATABASE_REPLICA_URLS to a second database',
+)
+class ReplicaDatabaseTests(APITransactionTestCase):
+    """
+    Runs against a real second database, e.g.
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py test property_details
+    Nothing replicates between the two test databases, so rows created
+    here exist only on the primary.
+    """
+    databases = '__all__'
+    url = '/api/v1/properties/'
+
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        self.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        self.prop = make_property(self.alice)
+        cache.clear()
+        cache.set(MODIFIED_KEY, 0, None)
+
+    def test_reads_go_to_replica_until_the_writer_is_pinned(self):
+        self.assertEqual(self.client.get(self.url).data['results'], [])
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get(f'{self.url}{self.prop.pk}/').status_code, 404)
+
+        self.client.force_authenticate(self.alice)
+        response = self.client.patch(f'{self.url}{self.prop.pk}/', {'price': 260000}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'{self.url}{self.prop.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['price'], '260000.00')
+
+
+class InstrumentationTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.prop = make_property(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(f'{self.url}{self.prop.pk}/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('"2 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_structured_log_line(self):
+        with self.assertLogs('backend_core.instrumentation', level='INFO') as logs:
+            response = self.client.get(self.url)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['db_queries'], 1)
+        self.assertEqual(record['response_bytes'], len(response.content))
+        self.assertIn('serialize_ms', record)
+
+    def test_slow_requests_log_at_warning(self):
+        with override_settings(PERF_SLOW_REQUEST_MS=0):
+            with self.assertLogs('backend_core.instrumentation', level='WARNING'):
+                self.client.get(self.url)
+
+    def test_slow_sampled_request_is_profiled(self):
+        directory = tempfile.mkdtemp()
+        with override_settings(PERF_PROFILE_SAMPLE_RATE=1, PERF_PROFILE_THRESHOLD_MS=0, PERF_PROFILE_DIR=directory):
+            with self.assertLogs('backend_core.instrumentation', level='WARNING'):
+                self.client.get(self.url)
+        self.assertEqual(len([name for name in os.listdir(directory) if name.endswith('.prof')]), 1)
+
+        directory = tempfile.mkdtemp()
+        with override_settings(PERF_PROFILE_SAMPLE_RATE=1, PERF_PROFILE_THRESHOLD_MS=60000, PERF_PROFILE_DIR=directory):
+            self.client.get(self.url)
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_async_view_queries_are_counted(self):
+        response = self.client.get(f'/api/v1/async/properties/{self.prop.pk}/')
+        self.assertIn('"2 queries"', response['Server-Timing'])
+
+
+@override_settings(CLOUDINARY_STORAGE={'CLOUD_NAME': 'demo', 'API_KEY': 'key', 'API_SECRET': 'secret'})
+class CloudinarySignatureTests(APITestCase):
+    url = '/api/v1/generate-upload-signature/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def setUp(self):
+        cache.clear()
+        uploads.get_credentials.cache_clear()
+        self.addCleanup(uploads.get_credentials.cache_clear)
+        self.client.force_authenticate(self.alice)
+
+    def test_single_signature(self):
+        data = self.client.post(self.url).data
+        self.assertEqual(data['signature'], uploads.sign({'timestamp': data['timestamp']}, 'secret'))
+        self.assertEqual((data['api_key'], data['cloud_name']), ('key', 'demo'))
+
+    def test_batch_signs_every_upload_param(self):
+        data = self.client.post(self.url, {'count': 3}, format='json').data
+        self.assertEqual(len(data['uploads']), 3)
+        self.assertEqual(len({upload['public_id'] for upload in data['uploads']}), 3)
+        for upload in data['uploads']:
+            params = {key: value for key, value in upload.items() if key != 'signature'}
+            self.assertEqual(params['folder'], 'properties')
+            self.assertIn('transformation', params)
+            self.assertEqual(upload['signature'], uploads.sign(params, 'secret'))
+
+    def test_single_signature_is_reused(self):
+        first = self.client.post(self.url).data
+        with mock.patch.object(uploads.time, 'time', return_value=first['timestamp'] + 60):
+            self.assertEqual(self.client.post(self.url).data['signature'], first['signature'])
+
+    def test_batches_never_repeat_public_ids(self):
+        # A retry after a failed save must not get IDs that may already hold an upload
+        first = self.client.post(self.url, {'count': 2}, format='json').data['uploads']
+        again = self.client.post(self.url, {'count': 2}, format='json').data['uploads']
+        self.assertFalse({upload['public_id'] for upload in first} & {upload['public_id'] for upload in again})
+
+    def test_invalid_count(self):
+        for count in (0, uploads.MAX_BATCH + 1, 'many'):
+            response = self.client.post(self.url, {'count': count}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_missing_credentials(self):
+        with override_settings(CLOUDINARY_STORAGE={}):
+            uploads.get_credentials.cache_clear()
+            self.assertEqual(self.client.post(self.url).status_code, 501)
+
+
+class OwnerDashboardTests(APITestCase):
+    url = '/api/v1/properties/'
+    mine_url = '/api/v1/properties/mine/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        make_property(cls.alice, price=100000)
+        make_property(cls.alice, price=200000, status=Property.PropertyStatus.SOLD)
+        make_property(cls.bob, price=300000)
+
+    def setUp(self):
+        self.client.force_authenticate(self.alice)
+
+    def assertSummariesMatchRebuild(self):
+        fields = ('owner_id', 'active_count', 'pending_count', 'sold_count', 'total_value', 'image_count')
+        # An owner whose last listing went keeps an all-zero row; rebuild() drops it
+        maintained = {row for row in OwnerSummary.objects.values_list(*fields) if any(row[1:])}
+        dashboard.rebuild()
+        self.assertEqual(maintained, set(OwnerSummary.objects.values_list(*fields)))
+
+    def test_lists_own_listings_in_every_status(self):
+        response = self.client.get(self.mine_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['price'] for item in response.data['results']], ['200000.00', '100000.00'])
+        self.assertEqual(response.data['summary'], {
+            'total': 2, 'status': {'active': 1, 'pending': 0, 'sold': 1},
+            'total_value': '300000.00', 'images': 0,
+        })
+        sold = self.client.get(self.mine_url, {'status': 'sold', 'page_size': 1}).data
+        self.assertEqual(len(sold['results']), 1)
+        self.assertIsNone(sold['next'])
+
+    def test_page_and_summary_without_aggregates(self):
+        # The page and the summary row
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.mine_url)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('SUM(', ' '.join(q['sql'] for q in ctx.captured_queries).upper())
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.mine_url).status_code, 401)
+
+    def test_writes_keep_summaries_current(self):
+        urls = [f'https://example.com/{i}.jpg' for i in range(3)]
+        response = self.client.post(self.url, {
+            'address': '2 Main Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '50000.00', 'bedrooms': 1,
+            'bathrooms': '1.0', 'size': 500, 'image_urls': urls,
+        }, format='json')
+        pk = response.data['id']
+        self.client.patch(f'{self.url}{pk}/', {
+            'price': '75000.00', 'status': 'pending', 'image_urls': urls[1:] + ['https://example.com/new.jpg'],
+        }, format='json')
+        self.assertEqual(self.client.get(self.mine_url).data['summary'], {
+            'total': 3, 'status': {'active': 1, 'pending': 1, 'sold': 1},
+            'total_value': '375000.00', 'images': 3,
+        })
+        self.assertSummariesMatchRebuild()
+
+        self.client.delete(f'{self.url}{pk}/')
+        Property.objects.only('id').filter(owner=self.bob).get().delete()
+        self.assertSummariesMatchRebuild()
+        self.assertEqual(OwnerSummary.objects.get(owner=self.alice).image_count, 0)
+
+    def test_bulk_import_updates_summary(self):
+        body = '\n'.join(json.dumps({
+            'address': f'{i} Import Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'price': '1000.00', 'bedrooms': 1, 'bathrooms': '1.0',
+            'size': 400, 'image_urls': [f'https://example.com/import/{i}.jpg'],
+        }) for i in range(3))
+        response = self.client.post(
+            f'{self.url}import/', body, content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.data['created'], 3)
+        self.assertSummariesMatchRebuild()
+
+
+@override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTests(APITestCase):
+    url = '/api/v1/properties/'
+    changes_url = '/api/v1/properties/changes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        cls.first = make_property(cls.alice, address='1 Main Street')
+        cls.second = make_property(cls.alice, address='2 Main Street')
+
+    def sync(self, since, **params):
+        response = self.client.get(self.changes_url, {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_returns_only_changes_after_the_token(self):
+        start = self.sync(0)
+        self.assertEqual([(c['type'], c['id']) for c in start['changes']], [
+            ('upsert', self.first.pk), ('upsert', self.second.pk),
+        ])
+        self.assertFalse(start['has_more'])
+        self.assertEqual(self.sync(start['next'])['changes'], [])
+
+        self.first.price = 1
+        self.first.save()
+        PropertyImage.objects.create(property=self.first, image_url='https://example.com/1.jpg')
+        second_pk = self.second.pk
+        self.second.delete()
+        changed = self.sync(start['next'])
+        # One entry per property, its latest state
+        self.assertEqual([(c['type'], c['id']) for c in changed['changes']], [
+            ('upsert', self.first.pk), ('delete', second_pk),
+        ])
+        upsert = changed['changes'][0]['property']
+        self.assertEqual(upsert['price'], '1.00')
+        self.assertEqual(len(upsert['images']), 1)
+
+    def test_hidden_listings_are_tombstones_for_others(self):
+        start = self.sync(0)['next']
+        self.first.status = Property.PropertyStatus.SOLD
+        self.first.save()
+        self.assertEqual(self.sync(start)['changes'][0]['type'], 'delete')
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.sync(start)['changes'][0]['type'], 'upsert')
+
+    def test_pages_through_the_log(self):
+        for i in range(3):
+            make_property(self.alice, address=f'{i} Side Street')
+        page = self.sync(0, limit=2)
+        self.assertTrue(page['has_more'])
+        seen = [c['id'] for c in page['changes']]
+        while page['has_more']:
+            page = self.sync(page['next'], limit=2)
+            seen += [c['id'] for c in page['changes']]
+        self.assertEqual(len(seen), 5)
+
+    def test_cost_does_not_depend_on_catalog_size(self):
+        start = self.sync(0)['next']
+        for i in range(5):
+            make_property(self.alice, address=f'{i} Side Street')
+        # change-log range, changed properties with owner, their images
+        with self.assertNumQueries(3):
+            self.sync(start)
+
+    def test_unsettled_changes_wait(self):
+        start = self.sync(0)['next']
+        self.first.save()
+        with override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=60):
+            self.assertEqual(self.sync(start)['changes'], [])
+        self.assertEqual(len(self.sync(start)['changes']), 1)
+
+    def test_compaction_keeps_latest_changes(self):
+        start = self.sync(0)['next']
+        for price in (1, 2, 3):
+            self.first.price = price
+            self.first.save()
+        before = self.sync(start)
+        # Creation and the first two price changes of the first property
+        self.assertEqual(changes.compact(), 3)
+        self.assertEqual(self.sync(start), before)
+        self.assertEqual(PropertyChange.objects.count(), 2)
+
+    def test_invalid_token_and_limit(self):
+        response = self.client.get(self.changes_url, {'since': 'abc'})
+        self.assertEqual((response.status_code, list(response.data)), (400, ['since']))
+        response = self.client.get(self.changes_url, {'since': 0, 'limit': 'many'})
+        self.assertEqual((response.status_code, list(response.data)), (400, ['limit']))
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+class LiveEventTests(APITestCase):
+    url = '/api/v1/properties/events/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def test_only_public_writes_publish_after_commit(self):
+        with mock.patch.object(events, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                prop = make_property(self.alice)
+                self.assertFalse(publish.called)
+            prop.price = 1
+            prop.save()
+            make_property(self.alice, status=Property.PropertyStatus.SOLD)
+            prop.status = Property.PropertyStatus.PENDING
+            with self.captureOnCommitCallbacks(execute=True):
+                prop.save()
+            prop.status = Property.PropertyStatus.ACTIVE
+            prop.save()
+            pk = prop.pk
+            with self.captureOnCommitCallbacks(execute=True):
+                prop.delete()
+        published = [call.args[0] for call in publish.call_args_list]
+        self.assertEqual([(e['type'], e['id'], e['status']) for e in published], [
+            ('created', pk, 'active'), ('status', pk, 'pending'), ('deleted', pk, None),
+        ])
+        self.assertEqual(published[1]['previous_status'], 'active')
+        self.assertEqual(published[0]['city'], 'Springfield')
+
+    async def test_hub_delivers_by_subscription_key(self):
+        city = events.hub.subscribe(events.subscription_keys({'city': 'Springfield', 'state': 'IL'}))
+        state = events.hub.subscribe(events.subscription_keys({'state': 'TX'}))
+        listing = events.hub.subscribe(events.subscription_keys({'property': '7,8'}))
+        try:
+            event = {'type': 'created', 'id': 8, 'city': 'Springfield', 'state': 'IL', 'status': 'active', 'price': '1'}
+            events.hub.dispatch(event)
+            await asyncio.sleep(0)
+            self.assertEqual(city.queue.get_nowait(), event)
+            self.assertEqual(listing.queue.get_nowait(), event)
+            self.assertTrue(state.queue.empty())
+        finally:
+            for subscriber in (city, state, listing):
+                events.hub.unsubscribe(subscriber)
+        self.assertEqual(len(events.hub), 0)
+
+    async def test_stream_sends_matching_events(self):
+        response = await self.async_client.get(self.url, {'state': 'IL'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertIn(b': connected', await anext(content))
+        events.publish({'type': 'deleted', 'id': 1, 'city': 'Austin', 'state': 'TX', 'status': None, 'price': '1'})
+        events.publish({'type': 'deleted', 'id': 2, 'city': 'Springfield', 'state': 'IL', 'status': None, 'price': '1'})
+        chunk = await asyncio.wait_for(anext(content), 1)
+        self.assertTrue(chunk.startswith(b'event: deleted\ndata: '))
+        self.assertEqual(json.loads(chunk.split(b'data: ')[1])['id'], 2)
+        await content.aclose()
+
+    async def test_slow_subscriber_is_dropped(self):
+        stream = events.stream([('all',)])
+        await anext(stream)
+        subscriber = next(iter(events.hub.connections))
+        event = {'type': 'deleted', 'id': 1, 'city': 'Austin', 'state': 'TX', 'status': None, 'price': '1'}
+        for _ in range(events.QUEUE_SIZE + 1):
+            events.hub.dispatch(event)
+        await asyncio.sleep(0)
+        self.assertTrue(subscriber.dropped)
+        # Closed without the backlog: the client resyncs from /properties/changes/
+        self.assertEqual([chunk async for chunk in stream], [])
+        self.assertEqual(len(events.hub), 0)
+
+    async def test_rejects_bad_subscriptions_and_overload(self):
+        client = self.async_client
+        self.assertEqual((await client.get(self.url, {'city': 'Springfield'})).status_code, 400)
+        self.assertEqual((await client.get(self.url, {'property': 'x'})).status_code, 400)
+        self.assertEqual((await client.post(self.url)).status_code, 405)
+        with override_settings(PROPERTY_EVENTS_MAX_SUBSCRIBERS=0):
+            self.assertEqual((await client.get(self.url)).status_code, 503)
+
+    def test_wsgi_is_refused(self):
+        # A WSGI worker would buffer the endless stream instead of sending it
+        self.assertEqual(self.client.get(self.url).status_code, 501)
+        self.assertEqual(len(events.hub), 0)
+
+
+@override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=0)
+class MarketStatsTests(APITestCase):
+    url = '/api/v1/properties/market-stats/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+
+    def at(self, prop, day):
+        # Dates the listing's latest history row
+        row = PropertyHistory.objects.filter(property_id=prop.pk).latest('pk')
+        row.recorded_at = datetime.fromisoformat(day).replace(tzinfo=dt_timezone.utc)
+        row.save()
+
+    def listing(self, day, city='Springfield', **kwargs):
+        prop = make_property(self.alice, city=city, **kwargs)
+        self.at(prop, day)
+        return prop
+
+    def sell(self, prop, day, price=None):
+        prop.status = Property.PropertyStatus.SOLD
+        if price is not None:
+            prop.price = price
+        prop.save()
+        self.at(prop, day)
+
+    def stats(self, **params):
+        response = self.client.get(self.url, {'state': 'IL', **params})
+        self.assertEqual(response.status_code, 200)
+        return {month['month']: month for month in response.data['months']}
+
+    def test_history_records_price_and_status_changes(self):
+        prop = make_property(self.alice, price=100000)
+        prop.bedrooms = 5
+        prop.save()
+        prop.price = 90000
+        prop.save()
+        prop.status = Property.PropertyStatus.PENDING
+        prop.save()
+        pk = prop.pk
+        prop.delete()
+        rows = PropertyHistory.objects.filter(property_id=pk).order_by('pk')
+        self.assertEqual(
+            [(row.previous_price, row.price, row.previous_status, row.status) for row in rows],
+            [
+                (None, 100000, None, 'active'),
+                (100000, 90000, 'active', 'active'),
+                (90000, 90000, 'active', 'pending'),
+                (90000, 90000, 'pending', None),
+            ],
+        )
+
+    def test_monthly_stats(self):
+        first = self.listing('2026-01-05', price=100000, size=1000)
+        second = self.listing('2026-01-20', price=300000, size=1500)
+        self.listing('2026-01-25', city='Chicago', price=500000, size=2000)
+        self.sell(first, '2026-02-04', price=110000)
+        self.sell(second, '2026-02-19')
+        market.refresh()
+
+        january = self.stats(city='Springfield')['2026-01']
+        self.assertEqual(january['new_listings']['count'], 2)
+        self.assertEqual(january['new_listings']['price'], {'p25': '150000.00', 'median': '200000.00', 'p75': '250000.00'})
+        self.assertEqual(january['new_listings']['price_per_sqft']['median'], '150.00')
+        self.assertEqual(january['sales']['count'], 0)
+        february = self.stats(city='Springfield')['2026-02']
+        self.assertEqual(february['sales']['count'], 2)
+        self.assertEqual(february['sales']['price']['median'], '205000.00')
+        self.assertEqual(february['sales']['days_on_market'], {'median': 30.0, 'p90': 30.0})
+        # The whole state includes Chicago
+        self.assertEqual(self.stats()['2026-01']['new_listings']['count'], 3)
+        self.assertEqual(list(self.stats(**{'from': '2026-02', 'to': '2026-02'})), ['2026-02'])
+
+    def test_listings_first_recorded_as_sold_are_not_sales(self):
+        # Created sold, like a listing backfilled by migration 0012: no sale date
+        self.listing('2026-01-05', price=100000, status=Property.PropertyStatus.SOLD)
+        sold = self.listing('2026-01-10', price=200000)
+        self.sell(sold, '2026-01-30')
+        market.refresh()
+        january = self.stats(city='Springfield')['2026-01']
+        self.assertEqual(january['new_listings']['count'], 2)
+        self.assertEqual(january['sales']['count'], 1)
+        self.assertEqual(january['sales']['price']['median'], '200000.00')
+        self.assertEqual(january['sales']['days_on_market'], {'median': 20.0, 'p90': 20.0})
+
+    def test_refresh_only_recomputes_touched_months(self):
+        first = self.listing('2026-01-05', price=100000)
+        self.listing('2026-03-05', price=200000)
+        self.assertEqual(market.refresh(), 4)
+        self.assertEqual(market.refresh(), 0)
+        self.sell(first, '2026-03-20')
+        # March for Springfield and for the state
+        self.assertEqual(market.refresh(), 2)
+        self.assertEqual(self.stats()['2026-03']['sales']['count'], 1)
+        incremental = self.rollups()
+        market.rebuild()
+        self.assertEqual(self.rollups(), incremental)
+
+    def rollups(self):
+        return list(MarketStats.objects.order_by('state', 'city', 'month').values(
+            *(field.name for field in MarketStats._meta.concrete_fields if field.name not in ('id', 'history_id'))
+        ))
+
+    def test_writes_queue_one_refresh(self):
+        make_property(self.alice)
+        make_property(self.alice)
+        self.assertEqual(Job.objects.filter(idempotency_key='market-stats').count(), 1)
+        queue.run_pending()
+        self.assertEqual(MarketStats.objects.filter(state='IL').count(), 2)
+
+    def test_unsettled_rows_queue_another_refresh(self):
+        make_property(self.alice)
+        queue.run_pending()
+        with override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=60):
+            # Written while the refresh job waits: it would skip the row
+            make_property(self.alice, city='Chicago')
+            Job.objects.filter(idempotency_key='market-stats').delete()
+            self.assertEqual(market.refresh(), 0)
+        self.assertTrue(Job.objects.filter(idempotency_key='market-stats', status=Job.Status.QUEUED).exists())
+        Job.objects.update(run_at=datetime.now(dt_timezone.utc))
+        queue.run_pending()
+        self.assertTrue(MarketStats.objects.filter(city='Chicago').exists())
+        self.assertFalse(Job.objects.filter(idempotency_key='market-stats', status=Job.Status.QUEUED).exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'SQLite runs one write transaction at a time')
+    def test_refreshes_are_serialized(self):
+        with CaptureQueriesContext(connection) as ctx:
+            market.refresh()
+        statements = [query['sql'] for query in ctx.captured_queries if 'SAVEPOINT' not in query['sql']]
+        self.assertIn('pg_advisory_xact_lock', statements[0])
+
+    def test_percentiles_without_numpy(self):
+        with mock.patch.object(market, 'numpy', None):
+            self.assertEqual(market.percentiles([4, 1, 3, 2], [25, 50, 100]), [1.75, 2.5, 4])
+            self.assertEqual(market.percentiles([], [50]), [None])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'state': 'IL', 'from': '2026'}).status_code, 400)
+
+
+class ThrottleTests(APITestCase):
+    url = '/api/v1/properties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.prop = make_property(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_statuses(self, count, params=None, url=None):
+        return [self.client.get(url or self.url, params).status_code for _ in range(count)]
+
+    @throttle_rates(anon_read='2/min')
+    def test_spoofed_forwarded_for_is_ignored(self):
+        # The proxy appends the real address after whatever the client sent
+        statuses = [
+            self.client.get(self.url, HTTP_X_FORWARDED_FOR=f'10.1.0.{i}, 10.0.0.9').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(self.client.get(self.url, HTTP_X_FORWARDED_FOR='10.0.0.10').status_code, 200)
+
+    @throttle_rates(anon_read='3/min')
+    def test_anonymous_reads_are_limited_per_ip(self):
+        self.assertEqual(self.get_statuses(4), [200, 200, 200, 429])
+        response = self.client.get(f'{self.url}{self.prop.pk}/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.get_statuses(1, url='/api/v1/async/properties/'), [429])
+        # Another client has its own window
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.2').status_code, 200)
+        # Authenticated reads are not limited by this scope
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.get_statuses(1), [200])
+
+    @throttle_rates(anon_read='10/min', anon_search='2/min')
+    def test_searches_have_a_tighter_limit(self):
+        self.assertEqual(self.get_statuses(3, {'q': 'main'}), [200, 200, 429])
+        self.assertEqual(self.get_statuses(1), [200])
+
+    @throttle_rates(user_write='2/min')
+    def test_writes_are_limited_per_user(self):
+        self.client.force_authenticate(self.owner)
+        url = f'{self.url}{self.prop.pk}/'
+        statuses = [self.client.patch(url, {'price': '1.00'}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(self.get_statuses(1), [200])
+
+    @throttle_rates(anon_read='4/min')
+    def test_window_slides(self):
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6030.0):
+            # 30s into a window: fill it
+            self.assertEqual(self.get_statuses(5), [200] * 4 + [429])
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6075.0):
+            # 15s into the next one the previous window still weighs 4 * 0.75
+            self.assertEqual(self.get_statuses(2), [200, 429])
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6110.0):
+            # 50s in: 4 * 1/6 + 1 leaves room for three more
+            self.assertEqual(self.get_statuses(4), [200, 200, 200, 429])
+
+    def test_unconfigured_scope_is_not_limited(self):
+        with throttle_rates(anon_read=None):
+            self.assertEqual(self.get_statuses(5), [200] * 5)
+
+
+class FacetTests(APITestCase):
+    url = '/api/v1/properties/facets/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        make_property(cls.alice, city='Springfield', price=150000, bedrooms=2)
+        make_property(cls.alice, city='Springfield', price=450000, bedrooms=6)
+        make_property(cls.alice, city='Shelbyville', price=450000, bedrooms=3)
+        make_property(cls.alice, city='Shelbyville', status=Property.PropertyStatus.SOLD)
+
+    def assertAggregateMatchesRebuild(self):
+        maintained = {
+            tuple(row[d] for d in facets.DIMENSIONS): row['count']
+            for row in PropertyFacet.objects.filter(count__gt=0).values(*facets.DIMENSIONS, 'count')
+        }
+        facets.rebuild()
+        rebuilt = {
+            tuple(row[d] for d in facets.DIMENSIONS): row['count']
+            for row in PropertyFacet.objects.values(*facets.DIMENSIONS, 'count')
+        }
+        self.assertEqual(maintained, rebuilt)
+
+    def test_counts_come_from_aggregate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'min_price': 300000})
+        self.assertEqual(response.data['source'], 'aggregate')
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['city'], [
+            {'value': 'Shelbyville', 'count': 1}, {'value': 'Springfield', 'count': 1},
+        ])
+        self.assertEqual(response.data['bedrooms'], [
+            {'value': '3', 'count': 1}, {'value': '5+', 'count': 1},
+        ])
+
+    def test_unaligned_filter_counts_live(self):
+        response = self.client.get(self.url, {'max_price': 200000})
+        self.assertEqual(response.data['source'], 'live')
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['price'], [{'min': 100000, 'max': 200000, 'count': 1}])
+
+    def test_owner_sees_own_inactive_listings(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.get(self.url, {'city': 'Shelbyville'})
+        self.assertEqual(response.data['source'], 'aggregate')
+        self.assertEqual(
+            {entry['value']: entry['count'] for entry in response.data['status']},
+            {'active': 1, 'sold': 1},
+        )
+
+    def test_writes_keep_aggregate_current(self):
+        prop = Property.objects.filter(city='Springfield').first()
+        prop.city, prop.price = 'Ogdenville', 900000
+        prop.save()
+        Property.objects.only('id').get(pk=prop.pk).delete()
+        deferred = Property.objects.only('id', 'status').get(city='Shelbyville', status=Property.PropertyStatus.ACTIVE)
+        deferred.status = Property.PropertyStatus.PENDING
+        deferred.save()
+        self.assertAggregateMatchesRebuild()
@@ -0,0 +1,74 @@
+import hashlib
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Cloudinary rejects a signed upload whose timestamp is older than this
+SIGNATURE_VALIDITY = 3600
+# Most upload URLs one batch can sign
+MAX_BATCH = 50
+
+SIGNATURE_KEY = 'cloudinary:signature'
+
+
+@lru_cache(maxsize=None)
+def get_credentials():
+    """
+    (cloud_name, api_key, api_secret) from CLOUDINARY_STORAGE, read once
+    per process, or None when any of them is missing.
+    """
+    storage = getattr(settings, 'CLOUDINARY_STORAGE', {})
+    credentials = (storage.get('CLOUD_NAME'), storage.get('API_KEY'), storage.get('API_SECRET'))
+    return credentials if all(credentials) else None
+
+
+def sign(params, api_secret):
+    """
+    Cloudinary's upload signature: the params sorted by name as k=v pairs
+    joined with '&', followed by the API secret, SHA-1 hashed.
+    The client must send exactly these params with the upload.
+    """
+    to_sign = '&'.join(f'{key}={value}' for key, value in sorted(params.items()))
+    return hashlib.sha1(f'{to_sign}{api_secret}'.encode('utf-8')).hexdigest()
+
+
+def signature(api_secret):
+    """
+    A single timestamp-only signature (the original endpoint's response).
+    It fixes no public ID, so Cloudinary names every upload made with it
+    and one signature is shared for CLOUDINARY_SIGNATURE_REUSE seconds.
+    """
+    data = cache.get(SIGNATURE_KEY)
+    if data is None:
+        timestamp = int(time.time())
+        data = {'signature': sign({'timestamp': timestamp}, api_secret), 'timestamp': timestamp}
+        cache.set(SIGNATURE_KEY, data, settings.CLOUDINARY_SIGNATURE_REUSE)
+    return data
+
+
+def issue_batch(user, count, api_secret):
+    """
+    Signed upload params for `count` uploads, each with its own public ID,
+    the listing folder and the incoming transformation that caps the
+    stored original's size. Overwriting is disabled, so a signature can
+    never replace an image that was already uploaded with it.
+
+    Batches are never cached: a retry after a failed save would get the
+    same public IDs back, and Cloudinary answers an upload to an existing
+    ID with the asset already stored there instead of the new image.
+    """
+    timestamp = int(time.time())
+    uploads = []
+    for _ in range(count):
+        params = {
+            'folder': settings.CLOUDINARY_UPLOAD_FOLDER,
+            'overwrite': 'false',
+            'public_id': f'{user.pk}-{uuid.uuid4().hex}',
+            'timestamp': timestamp,
+            'transformation': settings.CLOUDINARY_UPLOAD_TRANSFORMATION,
+        }
+        uploads.append({**params, 'signature': sign(params, api_secret)})
+    return {'expires_at': timestamp + SIGNATURE_VALIDITY, 'uploads': uploads}
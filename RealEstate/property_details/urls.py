@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 # Ensure both views are imported correctly
 from .views import PropertyViewSet, GenerateCloudinarySignatureView
+from .async_views import AsyncPropertyView, AsyncCloudinarySignatureView, property_events
 
 # Create a router and register our viewset with it.
 router = DefaultRouter()
@@ -14,6 +15,16 @@ urlpatterns = [
     # /api/v1/generate-upload-signature/
     path('generate-upload-signature/', GenerateCloudinarySignatureView.as_view(), name='generate-upload-signature'),
 
+    # --- Async read path (see async_views.py and gunicorn_asgi.conf.py) ---
+    # /api/v1/async/properties/, /api/v1/async/properties/<id>/
+    path('async/properties/', AsyncPropertyView.as_view(), name='async-property-list'),
+    path('async/properties/<int:pk>/', AsyncPropertyView.as_view(), name='async-property-detail'),
+    path('async/generate-upload-signature/', AsyncCloudinarySignatureView.as_view(), name='async-generate-upload-signature'),
+
+    # --- Live listing events over Server-Sent Events (ASGI only) ---
+    # /api/v1/properties/events/ (before the router, whose detail route would match it)
+    path('properties/events/', property_events, name='property-events'),
+
     # /api/v1/... (includes /properties/, /properties/<id>/, etc.)
     path('', include(router.urls)),
 ]
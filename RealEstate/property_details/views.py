@@ -1,85 +1,315 @@
-import os
-import time
-import hashlib
+import logging
+from datetime import datetime
 import cloudinary
-from django.db.models import Q
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import Substr
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import Property, PropertyImage
-from .serializers import PropertySerializer
+from .models import Property, PropertyChange, PropertyImage
+from .serializers import PropertySerializer, PropertyListSerializer
 from .permissions import IsOwnerOrReadOnly
 from .filters import PropertyFilter
+from .pagination import PropertyCursorPagination
+from .cache import AnonymousCacheMixin
+from .optimization import OptimizedQuerysetMixin
+from .replicas import ReplicaReadMixin
+from backend_core.throttling import SignatureThrottle
+from . import bulk, changes, dashboard, facets, geo, market, uploads
+
+logger = logging.getLogger(__name__)
 
 # --- Property ViewSet (Main API Logic) ---
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(ReplicaReadMixin, AnonymousCacheMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     """
     Handles Listing, Creation, Retrieval, Update, and Deletion of properties.
-    Includes performance fixes for image fetching.
+    Joins, prefetches and loaded columns follow the serializer's Meta
+    (see optimization.py). Anonymous list/detail responses are cached (see cache.py).
+    Reads go to a replica when one is configured (see replicas.py).
     """
-    queryset = Property.objects.all().prefetch_related('images').order_by('-created_at')
+    queryset = Property.objects.all().prefetch_related('images').order_by('-created_at', '-id')
     serializer_class = PropertySerializer
     permission_classes = [IsOwnerOrReadOnly]
     filterset_class = PropertyFilter
-    search_fields = ['address', 'city', 'state', 'description']
+    pagination_class = PropertyCursorPagination
+    # Change-log rows read per /changes/ request, and the most ?limit= allows
+    changes_limit = 200
+    max_changes_limit = 1000
     
     def get_serializer_context(self):
         # Pass request context, needed for setting 'owner' during creation
         return {'request': self.request}
 
+    def get_serializer_class(self):
+        # Cards on the listing only need a compact representation
+        if self.action in ('list', 'mine'):
+            return PropertyListSerializer
+        return PropertySerializer
+
     def get_queryset(self):
         """
         Retrieves properties, applying permissions and performance fixes.
         """
         user = self.request.user
         
-        # --- FIX: Prefetch Related Images for Efficiency (Fixes blank images) ---
-        base_queryset = Property.objects.all().prefetch_related('images').order_by('-created_at')
-        
-        if user.is_authenticated:
-            # Authenticated users see active properties OR their own properties
-            return base_queryset.filter(
-                Q(status=Property.PropertyStatus.ACTIVE) | Q(owner=user)
-            ).distinct()
-        
-        # Public users only see active properties
-        return base_queryset.filter(status=Property.PropertyStatus.ACTIVE)
+        if self.action in ('list', 'mine'):
+            # One cover image per card, fetched by subquery instead of every image
+            base_queryset = Property.objects.with_cover_image()
+        else:
+            base_queryset = Property.objects.all()
+        base_queryset = self.optimize_queryset(base_queryset).order_by('-created_at', '-id')
+
+        if self.action == 'mine':
+            # Every status; served by the (owner, [status,] created_at) indexes
+            return base_queryset.filter(owner=user)
+
+        active_queryset = base_queryset.filter(status=Property.PropertyStatus.ACTIVE)
+
+        if not user.is_authenticated:
+            # Public users only see active properties
+            return active_queryset
+
+        if self.action == 'list':
+            # Authenticated users see active properties plus their own other listings.
+            # The two branches are disjoint, so instead of OR + DISTINCT the paginator
+            # combines them with UNION ALL, each branch using its own index.
+            own_queryset = base_queryset.filter(owner=user).exclude(
+                status=Property.PropertyStatus.ACTIVE
+            )
+            return [active_queryset, own_queryset]
+
+        # Single-object lookups go by primary key, so a plain OR is cheap there
+        return base_queryset.filter(Q(status=Property.PropertyStatus.ACTIVE) | Q(owner=user))
+
+    def filter_queryset(self, queryset):
+        # Apply the filters to each visibility branch of the listing
+        if isinstance(queryset, list):
+            return [super(PropertyViewSet, self).filter_queryset(branch) for branch in queryset]
+        return super().filter_queryset(queryset)
+
+    # --- Map clusters ---
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Listing counts per geohash cell for a map viewport:
+        ?bbox=west,south,east,north[&precision=1-9] plus any other filter.
+        Grouping happens in the database over the index range of the box,
+        so the response size depends on the zoom level, not the row count.
+        """
+        bbox = request.query_params.get('bbox')
+        if not bbox:
+            return Response({'bbox': ['This parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            precision = int(request.query_params['precision'])
+        except (KeyError, ValueError):
+            # bbox was already validated by PropertyFilter
+            west, south, east, north = (float(part) for part in bbox.split(','))
+            # Two levels finer than the cover gives at most a few hundred clusters
+            precision = min(
+                geo.cover_precision(*box) for box in geo.split_bbox(west, south, east, north)
+            ) + 2
+        precision = max(1, min(precision, geo.MAX_PRECISION))
+
+        cells = (
+            queryset.exclude(geohash=None)
+            .select_related(None).prefetch_related(None).order_by()
+            .annotate(cell=Substr('geohash', 1, precision))
+            .values('cell')
+            .annotate(count=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'))
+            .order_by('cell')
+        )
+        return Response({'precision': precision, 'clusters': list(cells)})
+
+    # --- Owner dashboard ---
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def mine(self, request):
+        """
+        The caller's own listings in any status, paginated and filterable
+        like the listing, plus the dashboard header totals (per-status
+        counts, total asking value, image count) read from their
+        OwnerSummary row instead of aggregated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['summary'] = dashboard.summary(request.user)
+        return response
+
+    # --- Change feed ---
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Incremental sync: ?since=<token> (0 for everything) returns the
+        properties written after that token, newest state only, as
+        upserts with the full representation or tombstones (deleted, or
+        no longer visible to the caller), plus the token to pass next.
+        Follow `next` while `has_more`. Costs one primary-key range scan
+        over the change log and one lookup of the changed properties.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({'since': ['Expected an integer token.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', self.changes_limit))
+        except ValueError:
+            return Response({'limit': ['Expected an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_changes_limit))
+
+        rows, next_token, has_more = changes.changes_since(max(since, 0), limit)
+        upserted = [property_id for _, property_id, kind in rows if kind == PropertyChange.Kind.UPSERT]
+        visible = {prop.pk: prop for prop in self.get_queryset().filter(pk__in=upserted)}
+        serializer = self.get_serializer(list(visible.values()), many=True)
+        data = dict(zip(visible, serializer.data))
+
+        results = []
+        for token, property_id, _ in rows:
+            if property_id in data:
+                results.append({'token': token, 'type': 'upsert', 'id': property_id, 'property': data[property_id]})
+            else:
+                results.append({'token': token, 'type': 'delete', 'id': property_id})
+        return Response({'changes': results, 'next': next_token, 'has_more': has_more})
+
+    # --- Filter facets ---
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts per status, city, state, bedroom bucket and price band for
+        the current filters. Filters the PropertyFacet aggregate can answer
+        are served from it; anything else is counted over the listing.
+        """
+        params = {
+            key: value for key, value in request.query_params.items()
+            if key not in ('cursor', 'page_size', 'fields', 'format')
+        }
+        lookup = facets.aggregate_filter(params)
+        if lookup is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response({'source': 'live', **facets.summarize(facets.live_rows(queryset))})
+
+        rows = []
+        status_filter = lookup.pop('status', Property.PropertyStatus.ACTIVE)
+        if status_filter == Property.PropertyStatus.ACTIVE:
+            rows += facets.aggregate_rows(lookup, status_filter)
+        if request.user.is_authenticated:
+            # The caller's own non-active listings are few; count them live
+            own_queryset = Property.objects.filter(owner=request.user).exclude(
+                status=Property.PropertyStatus.ACTIVE
+            )
+            rows += facets.live_rows(super().filter_queryset(own_queryset))
+        return Response({'source': 'aggregate', **facets.summarize(rows)})
+
+    # --- Market statistics ---
+    @action(detail=False, methods=['get'], url_path='market-stats')
+    def market_stats(self, request):
+        """
+        Monthly market statistics for ?state=<state>[&city=<city>], optionally
+        limited to ?from=YYYY-MM&to=YYYY-MM: new listings with their asking
+        price percentiles and price per sqft, and sales with their price
+        percentiles, price per sqft and days on market. Read from the
+        MarketStats rollups (see market.py), one row per month.
+        """
+        params = request.query_params
+        if not params.get('state'):
+            return Response({'state': ['This parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        months = {}
+        for name in ('from', 'to'):
+            if params.get(name):
+                try:
+                    months[name] = datetime.strptime(params[name], '%Y-%m').date()
+                except ValueError:
+                    return Response({name: ['Expected a month as YYYY-MM.']}, status=status.HTTP_400_BAD_REQUEST)
+        city = params.get('city', '')
+        return Response({
+            'state': params['state'],
+            'city': city or None,
+            'months': market.monthly_stats(params['state'], city, months.get('from'), months.get('to')),
+        })
+
+    # --- Bulk import / export ---
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[permissions.IsAuthenticated],
+        parser_classes=[bulk.NDJSONParser, bulk.CSVParser],
+    )
+    def bulk_import(self, request):
+        """
+        POST an NDJSON or CSV body (one property per line/row).
+        Valid rows are created for the caller; invalid rows are reported by
+        row number and skipped.
+        """
+        result = bulk.import_properties(request.data, request.user, self.get_serializer_context())
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
+    @action(
+        detail=False, methods=['get'],
+        renderer_classes=[bulk.NDJSONRenderer, bulk.CSVRenderer, JSONRenderer],
+    )
+    def export(self, request):
+        """
+        Streams every property matching the usual filters as NDJSON
+        (default) or CSV (?format=csv), without loading them all in memory.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'search_rank' in queryset.query.annotations:
+            queryset = queryset.order_by('-search_rank', '-id')
+        if request.accepted_renderer.format == 'csv':
+            response = StreamingHttpResponse(bulk.stream_csv(queryset), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="properties.csv"'
+            return response
+        return StreamingHttpResponse(bulk.stream_ndjson(queryset), content_type='application/x-ndjson')
 
 # --- Cloudinary Signature View (For Frontend Uploads) ---
-class GenerateCloudinarySignatureView(APIView):
+def signature_response(request):
     """
-    Generates a signed signature for secure direct uploads to Cloudinary.
+    Builds the upload signature response; shared by the sync view below
+    and its async counterpart in async_views.py.
+    Without `count` this is a single timestamp signature; with `count`
+    it is a batch of signed uploads (see uploads.issue_batch()).
     """
-    permission_classes = [permissions.IsAuthenticated]
+    # Loaded from the environment once per process
+    credentials = uploads.get_credentials()
+    if credentials is None:
+        return Response(
+            {"error": "Cloudinary credentials not available."},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    cloud_name, api_key, api_secret = credentials
 
-    def post(self, request, *args, **kwargs):
-        # Retrieve Cloudinary credentials from environment variables (set on Render or local .env)
-        cloud_name = os.environ.get('CLOUDINARY_CLOUD_NAME')
-        api_key = os.environ.get('CLOUDINARY_API_KEY')
-        api_secret = os.environ.get('CLOUDINARY_API_SECRET')
+    count = request.data.get('count')
+    try:
+        if count is None:
+            return Response({**uploads.signature(api_secret), 'api_key': api_key, 'cloud_name': cloud_name})
 
-        if not all([cloud_name, api_key, api_secret]):
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            count = 0
+        if not 1 <= count <= uploads.MAX_BATCH:
             return Response(
-                {"error": "Cloudinary credentials not available."},
-                status=status.HTTP_501_NOT_IMPLEMENTED
+                {'count': [f'Must be between 1 and {uploads.MAX_BATCH}.']},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        batch = uploads.issue_batch(request.user, count, api_secret)
+        return Response({**batch, 'api_key': api_key, 'cloud_name': cloud_name})
+    except Exception:
+        logger.exception("Error generating Cloudinary signature")
+        return Response({"error": "Failed to generate upload signature."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        try:
-            timestamp = int(time.time())
-            
-            # The string to sign must ONLY contain the parameters that are sent by the frontend (timestamp)
-            # This is the string required to generate a valid signature for Cloudinary.
-            string_to_sign = f"timestamp={timestamp}{api_secret}"
-            
-            # Generate the signature
-            signature = hashlib.sha1(string_to_sign.encode('utf-8')).hexdigest()
-
-            return Response({
-                'signature': signature,
-                'timestamp': timestamp,
-                'api_key': api_key,
-                'cloud_name': cloud_name,
-            })
-        except Exception as e:
-            print(f"Error generating Cloudinary signature: {e}")
-            return Response({"error": "Failed to generate upload signature."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenerateCloudinarySignatureView(APIView):
+    """
+    Generates signatures for secure direct uploads to Cloudinary:
+    one per call, or {"count": N} for N uploads in one round trip.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SignatureThrottle]
+
+    def post(self, request, *args, **kwargs):
+        return signature_response(request)
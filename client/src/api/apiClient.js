@@ -68,4 +68,10 @@ apiClient.interceptors.response.use(
   }
 );
 
+// 5. Live listing events (Server-Sent Events); EventSource can't go through axios
+export const openPropertyEvents = (params = {}) => {
+  const query = new URLSearchParams(params).toString();
+  return new EventSource(`${API_BASE_URL}/api/v1/properties/events/${query ? `?${query}` : ''}`);
+};
+
 export default apiClient;
@@ -1,6 +1,9 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 
+// Rendered widths of a card in the HomePage grid (1 to 4 columns)
+const CARD_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
 function PropertyCard({ property }) {
   // --- Debugging logs ---
   // console.log("PropertyCard received:", property);
@@ -13,30 +16,44 @@ function PropertyCard({ property }) {
     return <div className="border rounded-lg p-4 shadow-md bg-red-100 text-red-700">Invalid property data</div>; // Or return null
   }
 
-  // --- Safely access the first image ---
-  // Check if images array exists and has at least one item
-  const imageUrl = (property.images && property.images.length > 0)
-    ? property.images[0].image_url
-    : 'https://placehold.co/600x400/eee/ccc?text=No+Image'; // Provide a placeholder
+  // --- Safely access the cover image ---
+  // The list endpoint sends `cover_image`; full objects carry an images array
+  const cover = (property.images && property.images.length > 0) ? property.images[0] : null;
+  const manifest = property.cover_manifest || (cover && cover.manifest) || null;
+  const imageUrl = (manifest && manifest.variants.card.webp)
+    || property.cover_image
+    || (cover ? cover.image_url : null)
+    || 'https://placehold.co/600x400/eee/ccc?text=No+Image'; // Provide a placeholder
 
   const placeholderErrorUrl = 'https://placehold.co/600x400/eee/ccc?text=Image+Error';
 
   return (
     <div className="border rounded-lg overflow-hidden shadow-lg hover:shadow-xl transition-shadow duration-300 bg-white font-inter">
       <Link to={`/property/${property.id}`}>
-        <img
-          // Use the safely determined imageUrl
-          src={imageUrl}
-          alt={`Property at ${property.address}`}
-          className="w-full h-48 object-cover"
-          // Add error handling for broken image URLs
-          onError={(e) => {
-             if (e.target.src !== placeholderErrorUrl) {
-                e.target.onerror = null; // prevents looping
-                e.target.src = placeholderErrorUrl;
-             }
-          }}
-        />
+        <picture>
+          {/* AVIF/WebP variants, with the blurred placeholder shown until they load */}
+          {manifest && manifest.sources.map((source) => (
+            <source key={source.type} type={source.type} srcSet={source.srcset} sizes={CARD_SIZES} />
+          ))}
+          <img
+            // Use the safely determined imageUrl
+            src={imageUrl}
+            alt={`Property at ${property.address}`}
+            className="w-full h-48 object-cover bg-cover bg-center"
+            style={manifest ? { backgroundImage: `url(${manifest.placeholder})` } : undefined}
+            width={manifest?.width || undefined}
+            height={manifest?.height || undefined}
+            loading="lazy"
+            decoding="async"
+            // Add error handling for broken image URLs
+            onError={(e) => {
+               if (e.target.src !== placeholderErrorUrl) {
+                  e.target.onerror = null; // prevents looping
+                  e.target.src = placeholderErrorUrl;
+               }
+            }}
+          />
+        </picture>
         <div className="p-4">
           <h3 className="text-lg font-semibold text-gray-800 truncate">{property.address}</h3>
           <p className="text-sm text-gray-500">{property.city}, {property.state} {property.zip_code}</p>
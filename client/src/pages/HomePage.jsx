@@ -1,7 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 // Use absolute paths from the /src root
-import apiClient from '/src/api/apiClient.js';
+import apiClient, { openPropertyEvents } from '/src/api/apiClient.js';
 import PropertyCard from '/src/components/PropertyCard.jsx';
 import PropertyFilter from '/src/components/PropertyFilter.jsx';
 import Spinner from '/src/components/Spinner.jsx';
@@ -11,8 +11,13 @@ function HomePage() {
   const [properties, setProperties] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Read by the live event handlers, which are registered once
+  const filtersRef = useRef({});
 
   const fetchProperties = async (filters = {}) => {
+    filtersRef.current = filters;
     setLoading(true);
     setError('');
     
@@ -29,6 +34,7 @@ function HomePage() {
       // Handle paginated or non-paginated response
       const data = response.data.results || response.data;
       setProperties(Array.isArray(data) ? data : []);
+      setNextUrl(response.data.next || null);
 
     } catch (err) {
       console.error('Failed to fetch properties:', err);
@@ -40,10 +46,56 @@ function HomePage() {
     }
   };
 
+  // Follow the opaque cursor link returned by the API
+  const loadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const response = await apiClient.get(nextUrl);
+      const data = response.data.results || [];
+      setProperties(prev => [...prev, ...data]);
+      setNextUrl(response.data.next || null);
+    } catch (err) {
+      console.error('Failed to load more properties:', err);
+      setError(err.message || 'Failed to load more properties.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchProperties();
   }, []);
 
+  // --- Live updates instead of polling ---
+  useEffect(() => {
+    const source = openPropertyEvents();
+    const remove = (id) => setProperties(prev => prev.filter(p => p && p.id !== id));
+
+    source.addEventListener('created', async (e) => {
+      const event = JSON.parse(e.data);
+      // A filtered list may not include it; it shows up on the next search
+      if (Object.values(filtersRef.current).some(Boolean)) return;
+      try {
+        const response = await apiClient.get(`/api/v1/properties/${event.id}/`);
+        setProperties(prev => (
+          prev.some(p => p && p.id === event.id) ? prev : [response.data, ...prev]
+        ));
+      } catch (err) {
+        // Gone or hidden again already
+      }
+    });
+    source.addEventListener('status', (e) => {
+      const event = JSON.parse(e.data);
+      if (event.status !== 'active') {
+        remove(event.id);
+      }
+    });
+    source.addEventListener('deleted', (e) => remove(JSON.parse(e.data).id));
+
+    return () => source.close();
+  }, []);
+
   return (
     <div className="container mx-auto p-4">
       <PropertyFilter onSearch={fetchProperties} />
@@ -65,6 +117,18 @@ function HomePage() {
           )}
         </div>
       )}
+
+      {!loading && !error && nextUrl && (
+        <div className="text-center mt-8">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="bg-blue-600 text-white px-6 py-2 rounded-lg shadow-md hover:bg-blue-700 disabled:opacity-50 font-semibold transition-colors"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
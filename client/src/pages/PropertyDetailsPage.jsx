@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 // Use absolute paths from /src/
-import apiClient from '/src/api/apiClient.js';
+import apiClient, { openPropertyEvents } from '/src/api/apiClient.js';
 import { useAuth } from '/src/contexts/AuthContext.jsx';
 import Spinner from '/src/components/Spinner.jsx';
 import ErrorMessage from '/src/components/ErrorMessage.jsx';
@@ -46,6 +46,21 @@ function PropertyDetailsPage() {
         fetchProperty();
     }, [id]); // Re-run effect if ID changes
 
+    // Live status changes for this listing
+    useEffect(() => {
+        if (!id || isNaN(id)) return;
+        const source = openPropertyEvents({ property: id });
+        source.addEventListener('status', (e) => {
+            const event = JSON.parse(e.data);
+            setProperty(prev => (prev ? { ...prev, status: event.status } : prev));
+        });
+        source.addEventListener('deleted', () => {
+            setError('This property has just been removed.');
+            setProperty(null);
+        });
+        return () => source.close();
+    }, [id]);
+
     const handleDelete = async () => {
         // Confirmation dialog
         if (window.confirm('Are you sure you want to delete this property? This action cannot be undone.')) {
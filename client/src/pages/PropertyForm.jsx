@@ -6,6 +6,9 @@ import Spinner from '../components/Spinner.jsx';
 import ErrorMessage from '../components/ErrorMessage.jsx';
 // No need to import useAuth here unless specifically needed for validation
 
+// The backend signs at most this many uploads per request (uploads.MAX_BATCH)
+const SIGNATURE_BATCH_SIZE = 50;
+
 function PropertyForm() {
     // Check if there's an ID in the URL (for editing)
     const { id: propertyId } = useParams();
@@ -92,23 +95,28 @@ function PropertyForm() {
         try {
             // --- Upload Images (only if new images are selected) ---
             if (images.length > 0) {
+                // 1. Get signatures for every file, a batch per request
+                const uploads = [];
+                let api_key, cloud_name;
+                for (let start = 0; start < images.length; start += SIGNATURE_BATCH_SIZE) {
+                    const sigResponse = await apiClient.post('/api/v1/generate-upload-signature/', {
+                        count: Math.min(SIGNATURE_BATCH_SIZE, images.length - start),
+                    });
+                    ({ api_key, cloud_name } = sigResponse.data);
+                    uploads.push(...sigResponse.data.uploads);
+                }
+
                 uploadedImageUrls = await Promise.all(
-                    images.map(async (imageFile) => {
+                    images.map(async (imageFile, index) => {
                         try {
-                            // 1. Get signature from backend
-                             // Use correct API path
-                            const sigResponse = await apiClient.post('/api/v1/generate-upload-signature/', {
-                                // Optional: pass params if needed by backend, e.g., folder
-                            });
-                            const { signature, timestamp, api_key, cloud_name } = sigResponse.data;
-
-                            // 2. Prepare form data for Cloudinary
+                            // 2. Prepare form data for Cloudinary: the file plus
+                            // exactly the params the backend signed for it
                             const imageFormData = new FormData();
                             imageFormData.append('file', imageFile);
                             imageFormData.append('api_key', api_key);
-                            imageFormData.append('timestamp', timestamp);
-                            imageFormData.append('signature', signature);
-                            // Add folder if needed: imageFormData.append('folder', 'properties');
+                            Object.entries(uploads[index]).forEach(([key, value]) => {
+                                imageFormData.append(key, value);
+                            });
 
                             // 3. Upload directly to Cloudinary
                             const cloudinaryUrl = `https://api.cloudinary.com/v1_1/${cloud_name}/image/upload`;
@@ -124,7 +132,12 @@ function PropertyForm() {
                             }
 
                             const uploadResult = await uploadResponse.json();
-                            return uploadResult.secure_url; // Return the secure URL
+                            // Dimensions let the backend size the responsive variants
+                            return {
+                                url: uploadResult.secure_url,
+                                width: uploadResult.width,
+                                height: uploadResult.height,
+                            };
 
                         } catch (uploadError) {
                             console.error(`Error uploading file ${imageFile.name}:`, uploadError);